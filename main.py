@@ -1,7 +1,55 @@
 from saldoboek.cli import SaldoBoekCLI
+import argparse
+import contextlib
+import json
+import sys
 import traceback
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="SaldoBoek")
+    parser.add_argument('--batch', action='store_true', help="Importeer zonder vragen en toon een JSON samenvatting")
+    parser.add_argument('--bewaak', metavar='MAP', help="Bewaak MAP/<gebruikersnaam>/ en importeer nieuwe bestanden automatisch")
+    parser.add_argument('--interval', type=float, default=2, help="Seconden tussen twee scans bij --bewaak (standaard 2)")
+    parser.add_argument('--gebruiker', help="Naam van de gebruiker (verplicht bij --batch)")
+    parser.add_argument('--forceer', action='store_true', help="Eerder geïmporteerde bestanden opnieuw importeren")
+    parser.add_argument('--parallel', action='store_true', help="Bestanden parallel inlezen")
+    parser.add_argument('bestanden', nargs='*', help="Te importeren bestanden")
+    args = parser.parse_args()
+    if args.batch and (not args.gebruiker or not args.bestanden):
+        parser.error("--batch vereist --gebruiker en minstens één bestand")
+    return args
+
+def batch(args):
+    # Voortgangsmeldingen naar stderr, zodat stdout alleen de JSON bevat
+    with contextlib.redirect_stdout(sys.stderr):
+        cli = SaldoBoekCLI()
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            samenvatting = cli.run_batch(args.gebruiker, args.bestanden, forceer=args.forceer, parallel=args.parallel)
+    except ValueError as e:
+        print(f"Fout: {e}", file=sys.stderr)
+        return 2
+    finally:
+        cli.db.close()
+    print(json.dumps(samenvatting, ensure_ascii=False, indent=2))
+    return 1 if any(b['status'] == 'fout' for b in samenvatting['bestanden']) else 0
+
+def bewaak(args):
+    from saldoboek.database import DatabaseManager
+    from saldoboek.watcher import MapBewaker
+
+    db = DatabaseManager()
+    try:
+        MapBewaker(db, args.bewaak, interval=args.interval, parallel=args.parallel).run()
+    finally:
+        db.close()
+
 def main():
+    args = parse_args()
+    if args.batch:
+        sys.exit(batch(args))
+    if args.bewaak:
+        return bewaak(args)
     cli = SaldoBoekCLI()
     try:
         cli.run()
@@ -10,7 +58,8 @@ def main():
     except Exception as e:
         print(f"Er is een onverwachte fout opgetreden: {e}")
         traceback.print_exc()
+    finally:
+        cli.db.close()
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,19 @@
+import pandas as pd
+
+# Bedragen worden als hele centen (int) opgeslagen en opgeteld; euro's alleen voor weergave
+CENT = 100
+
+
+def naar_centen(bedrag):
+    """Zet een bedrag in euro om naar hele centen"""
+    return round(float(bedrag) * CENT)
+
+
+def reeks_naar_centen(reeks):
+    """Zet een Series met bedragen in euro om naar centen (Int64, leeg waar geen getal staat)"""
+    return (pd.to_numeric(reeks, errors='coerce') * CENT).round().astype('Int64')
+
+
+def euro(centen):
+    """Zet centen (getal of Series) om naar euro's, voor weergave en Excel"""
+    return centen / CENT
@@ -1,27 +1,179 @@
+import re
+from collections import OrderedDict
+import pandas as pd
+from .bedragen import euro
+from .database import categorie_tekst
+from .matcher import RegelMatcher
+from .regels import REGELS
+
+# Woorden zonder letters met minstens één cijfer: datums, tijden, kenmerken, pasnummers
+VLUCHTIG = re.compile(r'(?<!\S)(?:[^\w\s]|[\d_])*\d(?:[^\w\s]|[\d_])*(?!\S)')
+CACHE_GROOTTE = 10000
+AUTO_DREMPEL = 0.95
+# Automatisch toepassen ook alleen met genoeg voorbeelden van de categorie en duidelijk verschil met de tweede suggestie
+AUTO_MIN_VOORBEELDEN = 5
+AUTO_MARGE = 0.5
+
+
+def normaliseer_iban(waarde):
+    """Tegenrekening zonder spaties en in hoofdletters; '' als er geen is"""
+    if not isinstance(waarde, str):
+        return ''
+    return ''.join(waarde.split()).upper()
+
+
+def normaliseer_tekst(tekst):
+    """Vervang vluchtige woorden door '#', zodat terugkerende tegenpartijen dezelfde sleutel krijgen"""
+    return VLUCHTIG.sub('#', tekst)
+
+
+def _veilige_term(term):
+    """Kan deze zoekterm nooit (deels) op een vluchtig woord vallen?
+
+    Alleen een woord zonder letters in de zoekterm kan overlappen met een
+    vluchtig woord; zolang geen enkele regel zo'n woord bevat, geeft de
+    genormaliseerde tekst dezelfde categorie als de volledige tekst.
+    """
+    return all(any(teken.isalpha() for teken in woord) for woord in term.split())
+
+
 class Categorizer:
     def __init__(self, db_manager, gebruiker_id):
         self.db = db_manager
         self.gebruiker_id = gebruiker_id
-        self.rules = self._load_rules()
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._regelset = None
+        self._ververs_regels()
+        self._classifier = None
+
+    @property
+    def classifier(self):
+        """Classifier voor suggesties, bij eerste gebruik getraind op de eigen historie"""
+        if self._classifier is None:
+            from .classifier import CategorieClassifier
+            self._classifier = CategorieClassifier.uit_database(self.db, self.gebruiker_id)
+        return self._classifier
+
+    def suggest_clusters(self, clusters):
+        """Geef per cluster de suggesties [(categorie, zekerheid), ...], hoogste eerst.
+
+        De zekerheid is het gemiddelde over de transacties in het cluster.
+        Suggesties passen bij het teken van het bedrag (inkomsten of uitgaven).
+        """
+        if not clusters or not len(self.classifier):
+            return [[] for _ in clusters]
+
+        alles = pd.concat(clusters)
+        voorspelling = self.classifier.voorspel(alles['naam'], alles['omschrijving'], alles['bedrag'])
+        types = dict((naam, type_cat) for naam, type_cat, _ in self.db.get_categories(self.gebruiker_id))
+
+        resultaat = []
+        for cluster in clusters:
+            type_cat = 'inkomsten' if cluster['bedrag'].iloc[0] > 0 else 'uitgaven'
+            totaal = {}
+            for suggesties in voorspelling.loc[cluster.index, 'suggesties']:
+                for categorie, zekerheid in suggesties:
+                    totaal[categorie] = totaal.get(categorie, 0) + zekerheid / len(cluster)
+            resultaat.append(sorted(
+                ((cat, zekerheid) for cat, zekerheid in totaal.items() if (types.get(cat) or type_cat) == type_cat),
+                key=lambda suggestie: -suggestie[1]
+            ))
+        return resultaat
 
-    def _load_rules(self):
-        """Laad categorisatie regels uit database"""
+    def _load_rules(self, overslaan=None):
+        """Laad categorisatie regels uit database (optioneel zonder de regel met id overslaan)"""
         regels = self.db.execute(
-            "SELECT zoekterm, categorie FROM categorisatie_regels WHERE actief = 1 AND (gebruiker_id = ? OR gebruiker_id IS NULL)",
-            (self.gebruiker_id,),
+            "SELECT zoekterm, categorie FROM categorisatie_regels WHERE actief = 1 AND (gebruiker_id = ? OR gebruiker_id IS NULL) AND id IS NOT ? ORDER BY id",
+            (self.gebruiker_id, overslaan),
             fetch=True
         )
         return {term.lower(): cat for term, cat in regels}
 
-    def categorize(self, naam, omschrijving):
-        """Bepaal categorie op basis van naam en omschrijving"""
-        tekst = f"{naam} {omschrijving}".lower()
+    def _ververs_regels(self):
+        """Neem de gedeelde regels voor de huidige regelversie over.
 
-        # Zoek naar match in categorisatie regels
-        for zoekterm, categorie in self.rules.items():
-            if zoekterm in tekst:
-                return categorie
-        return None
+        Bij een nieuwe versie worden alleen de cache-items van gewijzigde
+        zoektermen verwijderd.
+        """
+        regelset = REGELS.voor(self.db, self.gebruiker_id)
+        if regelset is self._regelset:
+            return
+        oud, self._regelset = self._regelset, regelset
+        self.rules = regelset.regels
+        self.iban_rules = regelset.iban_regels
+        self.matcher = regelset.matcher
+
+        normaliseren = all(_veilige_term(term) for term in self.rules)
+        if oud is None or normaliseren != self._normaliseren:
+            self._normaliseren = normaliseren
+            self._cache.clear()
+            return
+        for zoekterm in oud.prioriteiten.keys() | regelset.prioriteiten.keys():
+            if (oud.prioriteiten.get(zoekterm), oud.regels.get(zoekterm)) != \
+                    (regelset.prioriteiten.get(zoekterm), regelset.regels.get(zoekterm)):
+                self._invalideer_cache(zoekterm)
+
+    def categorize(self, naam, omschrijving, tegenrekening=None):
+        """Bepaal categorie op basis van tegenrekening, of anders naam en omschrijving"""
+        iban = normaliseer_iban(tegenrekening)
+        if iban in self.iban_rules:
+            return self.iban_rules[iban]
+        return self._categorize_tekst(categorie_tekst(naam, omschrijving))
+
+    def _categorize_tekst(self, tekst):
+        """Categoriseer een (kleine letters) tekst via de LRU cache"""
+        sleutel = normaliseer_tekst(tekst) if self._normaliseren else tekst
+        if sleutel in self._cache:
+            self.cache_hits += 1
+            self._cache.move_to_end(sleutel)
+            return self._cache[sleutel]
+
+        self.cache_misses += 1
+        # Eén doorgang over de tekst; bij meerdere treffers wint de oudste regel
+        categorie = self.matcher.zoek(tekst)
+        self._cache[sleutel] = categorie
+        if len(self._cache) > CACHE_GROOTTE:
+            self._cache.popitem(last=False)
+        return categorie
+
+    def cache_info(self):
+        """Geef hits, misses en grootte van de categorisatie cache"""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 'grootte': len(self._cache)}
+
+    def _invalideer_cache(self, zoekterm):
+        """Verwijder alleen de cache-items waarvan de tekst de gewijzigde zoekterm bevat"""
+        if self._normaliseren and not _veilige_term(zoekterm):
+            self._normaliseren = False
+            self._cache.clear()
+            return
+        for sleutel in [sleutel for sleutel in self._cache if zoekterm in sleutel]:
+            del self._cache[sleutel]
+
+    def reload_config(self):
+        """Herlaad de YAML configuratie en neem nieuwe regels over"""
+        self.db.reload_config()
+        self._ververs_regels()
+
+    def categorize_batch(self, naam, omschrijving, tegenrekening=None):
+        """Categoriseer hele kolommen naam, omschrijving (en tegenrekening) in één keer.
+
+        Retourneert een Series (zelfde index) met de categorie, of None waar geen
+        regel past. Regels op tegenrekening gaan voor; elke unieke tekst wordt
+        maar één keer door de automaat gehaald.
+        """
+        self._ververs_regels()
+        tekst = (
+            pd.Series(naam, index=omschrijving.index).map(str)
+            + ' ' + omschrijving.map(str)
+        ).str.lower()
+        unieke_teksten = tekst.unique()
+        categorieen = tekst.map(dict(zip(unieke_teksten, map(self._categorize_tekst, unieke_teksten))))
+        if tegenrekening is not None and self.iban_rules:
+            per_iban = pd.Series(tegenrekening, index=omschrijving.index).map(normaliseer_iban).map(self.iban_rules)
+            categorieen = per_iban.where(per_iban.notna(), categorieen)
+        return categorieen.astype(object).where(categorieen.notna(), None)
 
     def create_new_category(self):
         """Maak nieuwe categorie aan"""
@@ -47,42 +199,189 @@ class Categorizer:
             print(f"! Categorie '{naam}' bestaat al")
             return None
 
-    def add_categorization_rule(self, zoekterm, categorie):
-        """Voeg categorisatie regel toe als deze nog niet bestaat voor deze gebruiker"""
+    def preview_rule_change(self, zoekterm, categorie=None):
+        """Bepaal welke transacties veranderen als zoekterm naar categorie wijst.
+
+        Met categorie=None wordt het deactiveren van de eigen regel bekeken.
+        Alleen transacties met de zoekterm in hun tekst worden opnieuw
+        beoordeeld, en alleen als hun huidige categorie nog de uitkomst van de
+        huidige regels is; handmatig gekozen categorieën blijven staan.
+        Retourneert een DataFrame met id, datum, omschrijving, categorie en
+        nieuwe_categorie. Er wordt niets opgeslagen.
+        """
+        zoekterm = zoekterm.lower()
+        self._ververs_regels()
+        if categorie is None:
+            eigen = self._eigen_regel(zoekterm)
+            nieuwe_regels = self._load_rules(overslaan=eigen[0] if eigen else None)
+        else:
+            nieuwe_regels = dict(self.rules)
+            nieuwe_regels[zoekterm] = categorie
+        oud, nieuw = self.matcher, RegelMatcher(nieuwe_regels)
+
+        # Kandidaten via de zoekindex, daarna exact op de tekst van de regels
+        kandidaten = self.db.search_transactions(
+            zoekterm, self.gebruiker_id, kolommen='t.id, t.datum, t.naam, t.omschrijving, t.tegenrekening, t.categorie'
+        )
+        teksten = [categorie_tekst(naam, omschrijving) for naam, omschrijving in zip(kandidaten['naam'], kandidaten['omschrijving'])]
+        bevat = [zoekterm in tekst for tekst in teksten]
+        kandidaten = kandidaten[bevat].copy()
+        teksten = [tekst for tekst, geraakt in zip(teksten, bevat) if geraakt]
+        # Regels op tegenrekening gaan voor en veranderen hier niet
+        per_iban = [self.iban_rules.get(normaliseer_iban(iban)) for iban in kandidaten['tegenrekening']]
+        kandidaten['oude_categorie'] = [cat or oud.zoek(tekst) or 'Ongecategoriseerd' for cat, tekst in zip(per_iban, teksten)]
+        kandidaten['nieuwe_categorie'] = [cat or nieuw.zoek(tekst) or 'Ongecategoriseerd' for cat, tekst in zip(per_iban, teksten)]
+
+        gewijzigd = (kandidaten['categorie'] == kandidaten['oude_categorie']) \
+            & (kandidaten['nieuwe_categorie'] != kandidaten['oude_categorie'])
+        return kandidaten.loc[gewijzigd, ['id', 'datum', 'omschrijving', 'categorie', 'nieuwe_categorie']]
+
+    def _eigen_regel(self, zoekterm):
+        """Geef (id, categorie) van de actieve regel van deze gebruiker voor zoekterm"""
+        regels = self.db.execute(
+            'SELECT id, categorie FROM categorisatie_regels WHERE zoekterm = ? AND gebruiker_id = ? AND actief = 1',
+            (zoekterm, self.gebruiker_id),
+            fetch=True
+        )
+        return regels[0] if regels else None
+
+    def _werk_categorieen_bij(self, conn, wijzigingen):
+        """Pas de wijzigingen uit preview_rule_change toe binnen de lopende transactie"""
+        if wijzigingen is None or wijzigingen.empty:
+            return 0
+        self._zet_categorieen(conn, wijzigingen['id'], wijzigingen['nieuwe_categorie'])
+        return len(wijzigingen)
+
+    def _zet_categorieen(self, conn, ids, categorieen):
+        """Zet per transactie-id de categorie (op naam); een onbekende categorie geeft een ValueError"""
+        categorieen = list(categorieen)
+        categorie_ids = self.db.get_category_ids(self.gebruiker_id, categorieen)
+        conn.executemany(
+            "UPDATE transacties SET categorie_id = ? WHERE id = ? AND gebruiker_id = ?",
+            [(categorie_ids[categorie], int(id_), self.gebruiker_id) for categorie, id_ in zip(categorieen, ids)]
+        )
+
+    def add_categorization_rule(self, zoekterm, categorie, wijzigingen=None):
+        """Voeg categorisatie regel toe als deze nog niet bestaat voor deze gebruiker.
+
+        Optioneel worden de wijzigingen uit preview_rule_change in dezelfde
+        transactie doorgevoerd.
+        """
         zoekterm_lower = zoekterm.lower()
     
         # Controleer of regel al bestaat voor deze gebruiker
         bestaand = self.db.execute(
             '''
-            SELECT 1 FROM categorisatie_regels
+            SELECT actief FROM categorisatie_regels
             WHERE zoekterm = ? AND gebruiker_id = ?
             ''',
             (zoekterm_lower, self.gebruiker_id),
             fetch=True
         )
     
-        if bestaand:
+        if bestaand and bestaand[0][0]:
             print(f"! Regel bestaat al voor deze gebruiker: '{zoekterm_lower}'")
             return
    
+        with self.db.transaction() as conn:
+            # Een eerder gedeactiveerde regel komt als nieuwste regel terug
+            conn.execute(
+                'DELETE FROM categorisatie_regels WHERE zoekterm = ? AND gebruiker_id = ? AND actief = 0',
+                (zoekterm_lower, self.gebruiker_id)
+            )
+            conn.execute(
+                '''
+                INSERT INTO categorisatie_regels (zoekterm, categorie, gebruiker_id)
+                VALUES (?, ?, ?)
+                ''',
+                (zoekterm_lower, categorie, self.gebruiker_id)
+            )
+            aangepast = self._werk_categorieen_bij(conn, wijzigingen)
+        self._ververs_regels()
+        print(f"✓ Regel toegevoegd: '{zoekterm_lower}' → '{categorie}'")
+        if aangepast:
+            print(f"✓ {aangepast} transacties hercategoriseerd")
+
+    def add_iban_rule(self, iban, categorie):
+        """Voeg een regel toe (of werk hem bij) die op tegenrekening categoriseert"""
+        iban = normaliseer_iban(iban)
+        if not iban:
+            print("! Geen tegenrekening opgegeven")
+            return
+
         self.db.execute(
             '''
-            INSERT INTO categorisatie_regels (zoekterm, categorie, gebruiker_id)
-            VALUES (?, ?, ?)
+            INSERT INTO iban_regels (iban, categorie, gebruiker_id) VALUES (?, ?, ?)
+            ON CONFLICT(iban, gebruiker_id) DO UPDATE SET categorie = excluded.categorie, actief = 1
             ''',
-            (zoekterm_lower, categorie, self.gebruiker_id)
+            (iban, categorie, self.gebruiker_id)
         )
-        self.rules[zoekterm_lower] = categorie
-        print(f"✓ Regel toegevoegd: '{zoekterm_lower}' → '{categorie}'")
+        self._ververs_regels()
+        print(f"✓ Regel toegevoegd: tegenrekening {iban} → '{categorie}'")
+
+    def ask_rule(self, categorie, tegenrekening=None):
+        """Vraag na handmatig categoriseren of er een regel voor toekomstige herkenning moet komen"""
+        if input("Wilt u een regel toevoegen voor toekomstige herkenning? (j/n): ").lower() != 'j':
+            return
+        iban = normaliseer_iban(tegenrekening)
+        if iban and input(f"Herkennen op tegenrekening {iban}? (j/n): ").strip().lower() == 'j':
+            self.add_iban_rule(iban, categorie)
+            return
+        zoekterm = input("Zoekterm: ").strip()
+        if zoekterm:
+            self.add_categorization_rule(zoekterm, categorie)
+
+    def update_categorization_rule(self, zoekterm, categorie, wijzigingen=None):
+        """Laat een zoekterm naar een andere categorie wijzen.
+
+        Een standaardregel wordt niet aangepast maar overschreven door een eigen
+        regel van deze gebruiker.
+        """
+        zoekterm = zoekterm.lower()
+        if zoekterm not in self.rules:
+            print(f"! Geen actieve regel voor '{zoekterm}'")
+            return
+
+        eigen = self._eigen_regel(zoekterm)
+        with self.db.transaction() as conn:
+            if eigen:
+                conn.execute('UPDATE categorisatie_regels SET categorie = ? WHERE id = ?', (categorie, eigen[0]))
+            else:
+                conn.execute(
+                    'INSERT OR REPLACE INTO categorisatie_regels (zoekterm, categorie, gebruiker_id) VALUES (?, ?, ?)',
+                    (zoekterm, categorie, self.gebruiker_id)
+                )
+            aangepast = self._werk_categorieen_bij(conn, wijzigingen)
+        self._ververs_regels()
+        print(f"✓ Regel gewijzigd: '{zoekterm}' → '{categorie}'")
+        if aangepast:
+            print(f"✓ {aangepast} transacties hercategoriseerd")
+
+    def deactivate_categorization_rule(self, zoekterm, wijzigingen=None):
+        """Zet de eigen regel van deze gebruiker voor zoekterm uit"""
+        zoekterm = zoekterm.lower()
+        eigen = self._eigen_regel(zoekterm)
+        if not eigen:
+            print(f"! Geen eigen regel voor '{zoekterm}' (standaardregels kunnen alleen gewijzigd worden)")
+            return
+
+        with self.db.transaction() as conn:
+            conn.execute('UPDATE categorisatie_regels SET actief = 0 WHERE id = ?', (eigen[0],))
+            aangepast = self._werk_categorieen_bij(conn, wijzigingen)
+        self._ververs_regels()
+        print(f"✓ Regel gedeactiveerd: '{zoekterm}'")
+        if aangepast:
+            print(f"✓ {aangepast} transacties hercategoriseerd")
 
     def update_transaction_category(self, item, categorie):
         """Update categorie van transactie"""
  
+        categorie_id = self.db.get_category_ids(self.gebruiker_id, [categorie])[categorie]
         self.db.execute('''
             UPDATE transacties
-            SET categorie = ?
+            SET categorie_id = ?
             WHERE datum = ? AND omschrijving = ? AND bedrag = ? AND gebruiker_id = ?
-            ''', (categorie, item['datum'], item['omschrijving'], item['bedrag'], self.gebruiker_id)
+            ''', (categorie_id, item['datum'], item['omschrijving'], int(item['bedrag']), self.gebruiker_id)
         )
         print(f"✓ Transactie gecategoriseerd als '{categorie}'")
 
@@ -95,9 +394,11 @@ class Categorizer:
             print("3. Categorisatie regels tonen")
             print("4. Nieuwe categorisatie regel toevoegen")
             print("5. Transacties hercategoriseren")
-            print("6. Terug naar hoofdmenu")
+            print("6. Categorisatie regel wijzigen of deactiveren")
+            print("7. Categorie hernoemen")
+            print("8. Terug naar hoofdmenu")
             
-            keuze = input("\nKeuze (1-6): ").strip()
+            keuze = input("\nKeuze (1-8): ").strip()
             
             if keuze == '1':
                 self._show_all_categories(gebruiker_id)
@@ -110,6 +411,10 @@ class Categorizer:
             elif keuze == '5':
                 self._recategorize_transactions(gebruiker_id)
             elif keuze == '6':
+                self._change_rule(gebruiker_id)
+            elif keuze == '7':
+                self._rename_category()
+            elif keuze == '8':
                 print("Programma afgesloten.")
                 break
 
@@ -152,13 +457,65 @@ class Categorizer:
                 current_cat = categorie
             print(f"  • '{zoekterm}'")
 
+        if self.iban_rules:
+            print(f"\n=== REGELS OP TEGENREKENING ({len(self.iban_rules)}) ===")
+            for iban, categorie in sorted(self.iban_rules.items(), key=lambda regel: (regel[1], regel[0])):
+                print(f"  • {iban} → {categorie}")
+
     def _add_new_rule(self, gebruiker_id):
         """Voeg nieuwe categorisatie regel toe"""
         print("\n--- Nieuwe categorisatie regel ---")
         zoekterm = input("Zoekterm: ").strip()
         if not zoekterm:
             return
+        print(f"'{zoekterm}' komt voor in {self.db.count_matches(zoekterm, self.gebruiker_id)} transacties")
         
+        categorie = self._kies_categorie()
+        if categorie:
+            wijzigingen = self._bevestig_wijzigingen(self.preview_rule_change(zoekterm, categorie))
+            self.add_categorization_rule(zoekterm, categorie, wijzigingen)
+
+    def _change_rule(self, gebruiker_id):
+        """Wijzig of deactiveer een bestaande categorisatie regel"""
+        print("\n--- Categorisatie regel wijzigen ---")
+        zoekterm = input("Zoekterm: ").strip().lower()
+        if zoekterm not in self.rules:
+            print(f"! Geen actieve regel voor '{zoekterm}'")
+            return
+        print(f"Huidige categorie: {self.rules[zoekterm]}")
+
+        actie = input("1=andere categorie, 2=deactiveren: ").strip()
+        if actie == '1':
+            categorie = self._kies_categorie()
+            if categorie:
+                wijzigingen = self._bevestig_wijzigingen(self.preview_rule_change(zoekterm, categorie))
+                self.update_categorization_rule(zoekterm, categorie, wijzigingen)
+        elif actie == '2':
+            if not self._eigen_regel(zoekterm):
+                print("! Standaardregels kunnen alleen gewijzigd worden")
+                return
+            wijzigingen = self._bevestig_wijzigingen(self.preview_rule_change(zoekterm))
+            self.deactivate_categorization_rule(zoekterm, wijzigingen)
+        else:
+            print("Ongeldige keuze.")
+
+    def _rename_category(self):
+        """Hernoem een categorie; transacties en maandtotalen verwijzen op id en blijven staan"""
+        print("\n--- Categorie hernoemen ---")
+        oude_naam = self._kies_categorie()
+        if not oude_naam:
+            return
+        nieuwe_naam = input("Nieuwe naam: ").strip()
+        if not nieuwe_naam:
+            return
+        if self.db.rename_category(self.gebruiker_id, oude_naam, nieuwe_naam):
+            self._ververs_regels()
+            print(f"✓ Categorie '{oude_naam}' hernoemd naar '{nieuwe_naam}'")
+        else:
+            print(f"! Categorie '{nieuwe_naam}' bestaat al")
+
+    def _kies_categorie(self):
+        """Laat de gebruiker een categorie kiezen; retourneert de naam of None"""
         categorieën = self.db.get_categories(self.gebruiker_id)
         print("\nBeschikbare categorieën:")
         for i, (cat_naam, cat_type, cat_desc) in enumerate(categorieën, 1):
@@ -167,12 +524,27 @@ class Categorizer:
         try:
             keuze = int(input("Kies categorie (nummer): ")) - 1
             if 0 <= keuze < len(categorieën):
-                categorie = categorieën[keuze][0]
-                self.add_categorization_rule(zoekterm, categorie)
-            else:
-                print("Ongeldig nummer.")
+                return categorieën[keuze][0]
+            print("Ongeldig nummer.")
         except ValueError:
             print("Ongeldige invoer.")
+        return None
+
+    def _bevestig_wijzigingen(self, wijzigingen, toon=20):
+        """Toon de getroffen transacties; retourneert ze als de gebruiker akkoord gaat"""
+        if wijzigingen.empty:
+            print("Geen bestaande transacties geraakt door deze wijziging.")
+            return None
+
+        print(f"\n{len(wijzigingen)} bestaande transacties veranderen van categorie:")
+        for row in wijzigingen.head(toon).itertuples():
+            print(f"  {row.datum} | {str(row.omschrijving)[:30]:30} | {row.categorie} → {row.nieuwe_categorie}")
+        if len(wijzigingen) > toon:
+            print(f"  ... en {len(wijzigingen) - toon} meer")
+
+        if input("Deze transacties ook aanpassen? (j/n): ").strip().lower() == 'j':
+            return wijzigingen
+        return None
     
     def _recategorize_transactions(self, gebruiker_id):
         """Hercategoriseer transacties"""
@@ -182,19 +554,21 @@ class Categorizer:
         print("3. Specifieke categorie")
         
         keuze = input("Keuze (1-3): ").strip()
+        params = (self.gebruiker_id,)
     
         if keuze == '1':
-            query = "SELECT * FROM transacties WHERE categorie = 'Ongecategoriseerd' AND gebruiker_id = ?"
+            query = "SELECT id, datum, naam, omschrijving, tegenrekening, categorie FROM transacties_overzicht WHERE categorie = 'Ongecategoriseerd' AND gebruiker_id = ?"
         elif keuze == '2':
-            query = "SELECT * FROM transacties WHERE gebruiker_id = ?"
+            query = "SELECT id, datum, naam, omschrijving, tegenrekening, categorie FROM transacties_overzicht WHERE gebruiker_id = ?"
         elif keuze == '3':
             categorie = input("Welke categorie hercategoriseren? ").strip()
-            query = f"SELECT * FROM transacties WHERE categorie = '{categorie}' AND gebruiker_id = ?"
+            query = "SELECT id, datum, naam, omschrijving, tegenrekening, categorie FROM transacties_overzicht WHERE categorie = ? AND gebruiker_id = ?"
+            params = (categorie, self.gebruiker_id)
         else:
             print("Ongeldige keuze.")
             return
         
-        df = self.db.query_df(query, (self.gebruiker_id,))  # Veronderstel dat `db.query_df` een pandas DataFrame retourneert
+        df = self.db.query_df(query, params)  # Veronderstel dat `db.query_df` een pandas DataFrame retourneert
         
         if df.empty:
             print("Geen transacties gevonden om te hercategoriseren.")
@@ -202,52 +576,96 @@ class Categorizer:
     
         print(f"\n{len(df)} transacties gevonden voor hercategorisatie...")
     
-        hercategoriseerd = 0
-        for _, row in df.iterrows():
-            oude_categorie = row['categorie']
-            omschrijving = str(row['omschrijving']) if row['omschrijving'] else ""
-            nieuwe_categorie = self.categorize(row['naam'], omschrijving)
-    
-            if nieuwe_categorie and nieuwe_categorie != oude_categorie:
-                self.db.execute(
-                    "UPDATE transacties SET categorie = ? WHERE id = ? AND gebruiker_id = ?",
-                    (nieuwe_categorie, row['id'], self.gebruiker_id)
-                )
-                hercategoriseerd += 1
-                print(f"  {row['datum']} | {omschrijving[:30]:30} | {oude_categorie} → {nieuwe_categorie}")
-    
-        print(f"\n✓ {hercategoriseerd} transacties hercategoriseerd")   
+        df['omschrijving'] = df['omschrijving'].fillna('')
+        df['nieuwe_categorie'] = self.categorize_batch(df['naam'], df['omschrijving'], df['tegenrekening'])
+        gewijzigd = df[df['nieuwe_categorie'].notna() & (df['nieuwe_categorie'] != df['categorie'])]
+
+        for row in gewijzigd.itertuples():
+            print(f"  {row.datum} | {str(row.omschrijving)[:30]:30} | {row.categorie} → {row.nieuwe_categorie}")
+
+        with self.db.transaction() as conn:
+            self._zet_categorieen(conn, gewijzigd['id'], gewijzigd['nieuwe_categorie'])
+
+        print(f"\n✓ {len(gewijzigd)} transacties hercategoriseerd")
    
     def categoriseer_bestaande_ongecategoriseerde_transacties(self, gebruiker_id):
-
-        df = self.db.execute_df("SELECT * FROM transacties WHERE categorie = 'Ongecategoriseerd' AND gebruiker_id = ?", (self.gebruiker_id,))
+        """Categoriseer alle ongecategoriseerde transacties, per cluster"""
+        df = self.db.execute_df(
+            "SELECT id, datum, rekening, tegenrekening, naam, omschrijving, bedrag FROM transacties_overzicht WHERE categorie = 'Ongecategoriseerd' AND gebruiker_id = ?",
+            (self.gebruiker_id,)
+        )
 
         if df.empty:
             print("Er zijn geen ongecategoriseerde transacties.")
             return
     
         print(f"\nEr zijn {len(df)} ongecategoriseerde transacties.")
-    
-        # Haal alle categorieën op
+        if self.review_clusters(df):
+            print("✓ Categorisatie van alle ongecategoriseerde transacties voltooid.")
+
+    def cluster_transactions(self, df):
+        """Groepeer transacties per tegenpartij.
+
+        Transacties met een tegenrekening vallen samen op IBAN, de rest op de
+        genormaliseerde naam en omschrijving (zonder datums en kenmerken). Bij- en
+        afschrijvingen komen altijd in aparte clusters. Retourneert een lijst
+        DataFrames, grootste cluster eerst.
+        """
+        iban = df['tegenrekening'].map(normaliseer_iban)
+        tekst = [normaliseer_tekst(categorie_tekst(naam, omschrijving)) for naam, omschrijving in zip(df['naam'], df['omschrijving'])]
+        sleutel = iban.where(iban != '', pd.Series(tekst, index=df.index))
+        inkomsten = df['bedrag'] > 0
+
+        clusters = [groep for _, groep in df.groupby([sleutel, inkomsten], sort=False)]
+        return sorted(clusters, key=len, reverse=True)
+
+    def review_clusters(self, df):
+        """Laat de gebruiker ongecategoriseerde transacties per cluster categoriseren.
+
+        df bevat minstens id, datum, tegenrekening, naam, omschrijving en bedrag.
+        Eén keuze geldt voor het hele cluster en wordt in één keer opgeslagen.
+        Retourneert False als de gebruiker is gestopt.
+        """
+        clusters = self.cluster_transactions(df)
+        suggesties = self.suggest_clusters(clusters)
         alle_categorieën = self.db.get_categories(self.gebruiker_id)
-    
-        print("\nOpties bij elke transactie:")
+
+        print(f"{len(df)} transacties in {len(clusters)} groepen")
+
+        zeker = [i for i, s in enumerate(suggesties) if self._automatisch(s)]
+        if zeker:
+            aantal = sum(len(clusters[i]) for i in zeker)
+            vraag = f"{len(zeker)} groepen ({aantal} transacties) hebben een suggestie met ≥{AUTO_DREMPEL:.0%} zekerheid. Automatisch toepassen? (j/n): "
+            if input(vraag).strip().lower() == 'j':
+                for i in zeker:
+                    self.update_categories(clusters[i]['id'], suggesties[i][0][0])
+                    self._leer(clusters[i], suggesties[i][0][0])
+                clusters = [c for i, c in enumerate(clusters) if i not in zeker]
+                suggesties = [s for i, s in enumerate(suggesties) if i not in zeker]
+
+        print("\nOpties bij elke groep:")
         print("- Voer nummer in voor categorie")
+        print("- Enter om de suggestie over te nemen")
         print("- 'n' voor nieuwe categorie maken")
         print("- 's' om te skippen (blijft ongecategoriseerd)")
         print("- 'q' om te stoppen met categoriseren")
-    
-        for _, row in df.iterrows():
+
+        for nummer, (cluster, suggestie) in enumerate(zip(clusters, suggesties), 1):
+            eerste = cluster.iloc[0]
             print(f"\n{'='*60}")
-            print(f"Datum:         {row['datum']}")
-            print(f"Rekening:      {row['rekening']}")
-            print(f"Tegenrekening: {row['tegenrekening']}")
-            print(f"Naam:          {row['naam']}")
-            print(f"Omschrijving:  {row['omschrijving']}")
-            print(f"Bedrag:        €{row['bedrag']:.2f}")
-            
+            print(f"Groep {nummer}/{len(clusters)}: {len(cluster)} transacties")
+            print(f"Tegenrekening: {eerste['tegenrekening']}")
+            print(f"Naam:          {eerste['naam']}")
+            print(f"Omschrijving:  {eerste['omschrijving']}")
+            if len(cluster) > 1:
+                print(f"Periode:       {cluster['datum'].min()} t/m {cluster['datum'].max()}")
+                print(f"Bedrag:        €{euro(cluster['bedrag'].min()):.2f} t/m €{euro(cluster['bedrag'].max()):.2f}")
+            else:
+                print(f"Datum:         {eerste['datum']}")
+                print(f"Bedrag:        €{euro(eerste['bedrag']):.2f}")
+
             # Filter categorieën op basis van bedrag (positief = inkomsten, negatief = uitgaven)
-            if row['bedrag'] > 0:
+            if eerste['bedrag'] > 0:
                 relevante_categorieën = [c for c in alle_categorieën if c[1] == 'inkomsten']
                 print(f"\nBeschikbare INKOMSTEN categorieën:")
             else:
@@ -256,46 +674,56 @@ class Categorizer:
             
             for i, (cat_naam, cat_type, cat_desc) in enumerate(relevante_categorieën, 1):
                 print(f"{i:2d}. {cat_naam} ({cat_type})")
+            if suggestie:
+                print("Suggestie:     " + ", ".join(f"{cat} ({zekerheid:.0%})" for cat, zekerheid in suggestie[:3]))
     
             while True:
                 keuze = input("Categorie keuze: ").strip().lower()
                 if keuze == 'q':
                     print("Categorisatie gestopt.")
-                    return
-    
+                    return False
+                elif keuze == '' and suggestie:
+                    gekozen = suggestie[0][0]
                 elif keuze == 's':
                     break
-    
                 elif keuze == 'n':
-                    nieuwe_cat = self.create_new_category()
-                    if nieuwe_cat:
-                        self.db.execute(
-                            "UPDATE transacties SET categorie = ? WHERE id = ? AND gebruiker_id = ?",
-                            (nieuwe_cat, row['id'], self.gebruiker_id)
-                        )
-                        if input("Wilt u een regel toevoegen voor toekomstige herkenning? (j/n): ").lower() == 'j':
-                            zoekterm = input("Zoekterm: ").strip()
-                            if zoekterm:
-                                self.add_categorization_rule(zoekterm, nieuwe_cat)
-                    break
-    
+                    gekozen = self.create_new_category()
+                    if gekozen:
+                        alle_categorieën = self.db.get_categories(self.gebruiker_id)
                 else:
                     try:
                         index = int(keuze) - 1
-                        if 0 <= index < len(relevante_categorieën):
-                            gekozen = relevante_categorieën[index][0]
-                            self.db.execute(
-                                "UPDATE transacties SET categorie = ? WHERE id = ? AND gebruiker_id = ?",
-                                (gekozen, row['id'], self.gebruiker_id)
-                            )
-                            if input("Wilt u een regel toevoegen voor toekomstige herkenning? (j/n): ").lower() == 'j':
-                                zoekterm = input("Zoekterm: ").strip()
-                                if zoekterm:
-                                    self.add_categorization_rule(zoekterm, gekozen)
-                            break
-                        else:
-                            print("Ongeldig nummer. Probeer opnieuw.")
                     except ValueError:
                         print("Ongeldige invoer. Probeer opnieuw.")
-    
-        print("✓ Categorisatie van alle ongecategoriseerde transacties voltooid.")
+                        continue
+                    if not 0 <= index < len(relevante_categorieën):
+                        print("Ongeldig nummer. Probeer opnieuw.")
+                        continue
+                    gekozen = relevante_categorieën[index][0]
+
+                if gekozen:
+                    self.update_categories(cluster['id'], gekozen)
+                    self._leer(cluster, gekozen)
+                    self.ask_rule(gekozen, eerste['tegenrekening'])
+                break
+
+        return True
+
+    def _automatisch(self, suggestie):
+        """Of een suggestie zeker genoeg is om zonder keuze per groep toe te passen"""
+        if not suggestie or suggestie[0][1] < AUTO_DREMPEL:
+            return False
+        categorie, zekerheid = suggestie[0]
+        tweede = suggestie[1][1] if len(suggestie) > 1 else 0.0
+        return self.classifier.documenten[categorie] >= AUTO_MIN_VOORBEELDEN and zekerheid - tweede >= AUTO_MARGE
+
+    def _leer(self, cluster, categorie):
+        """Leer een handmatig (of automatisch) gekozen categorie bij in de classifier"""
+        if self._classifier is not None:
+            self._classifier.leer(cluster['naam'], cluster['omschrijving'], cluster['bedrag'], [categorie] * len(cluster))
+
+    def update_categories(self, ids, categorie):
+        """Zet de categorie van een reeks transacties in één transactie"""
+        with self.db.transaction() as conn:
+            self._zet_categorieen(conn, ids, [categorie] * len(ids))
+        print(f"✓ {len(ids)} transacties gecategoriseerd als '{categorie}'")
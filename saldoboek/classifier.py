@@ -0,0 +1,145 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .categorization import normaliseer_tekst
+from .database import categorie_tekst
+
+N_GRAM = 3
+BLOK = 5000
+# Gewicht van de gemiddelde log-kans per kenmerk: de n-grams van één tekst tellen samen als zoveel onafhankelijke kenmerken
+KALIBRATIE = 4
+
+
+def _bedragklasse(bedrag):
+    """Teken en orde van grootte van een bedrag in centen, bijvoorbeeld ('af', 4) voor -150,00"""
+    try:
+        bedrag = float(bedrag)
+    except (TypeError, ValueError):
+        bedrag = 0.0
+    if bedrag != bedrag or not bedrag:
+        return ('af', 0)
+    return ('bij' if bedrag > 0 else 'af', int(math.floor(math.log10(abs(bedrag)))))
+
+
+def _sleutel(naam, omschrijving, bedrag):
+    return normaliseer_tekst(categorie_tekst(naam, omschrijving)), _bedragklasse(bedrag)
+
+
+def _kenmerken(tekst, klasse):
+    """Tekenreeks-n-grams van de tekst plus teken en grootte van het bedrag"""
+    tekst = f" {tekst} "
+    kenmerken = {tekst[i:i + N_GRAM] for i in range(len(tekst) - N_GRAM + 1)}
+    kenmerken.add(f"__{klasse[0]}")
+    kenmerken.add(f"__{klasse[0]}{klasse[1]}")
+    return kenmerken
+
+
+class CategorieClassifier:
+    """Naive Bayes classifier voor categoriesuggesties, getraind op eigen historie.
+
+    Draait lokaal zonder extra afhankelijkheden. Leren telt alleen kenmerken op,
+    dus nieuw gecategoriseerde transacties kunnen direct worden bijgeleerd.
+    Voorspellen gebeurt per unieke combinatie van tekst en bedragsklasse, met
+    de kansmatrix in numpy.
+    """
+
+    def __init__(self, alpha=0.5):
+        self.alpha = alpha
+        self.documenten = Counter()
+        self.tellingen = {}
+        self.totalen = Counter()
+        self._model = None
+
+    def __len__(self):
+        return sum(self.documenten.values())
+
+    @classmethod
+    def uit_database(cls, db, gebruiker_id):
+        """Train op alle gecategoriseerde transacties van een gebruiker"""
+        df = db.query_df(
+            "SELECT naam, omschrijving, bedrag, categorie FROM transacties_overzicht "
+            "WHERE gebruiker_id = ? AND categorie IS NOT NULL AND categorie != 'Ongecategoriseerd'",
+            (gebruiker_id,)
+        )
+        classifier = cls()
+        classifier.leer(df['naam'], df['omschrijving'], df['bedrag'], df['categorie'])
+        return classifier
+
+    def leer(self, naam, omschrijving, bedrag, categorie):
+        """Leer bij uit kolommen (of lijsten) naam, omschrijving, bedrag en categorie"""
+        for n, o, b, cat in zip(naam, omschrijving, bedrag, categorie):
+            kenmerken = _kenmerken(*_sleutel(n, o, b))
+            self.documenten[cat] += 1
+            self.tellingen.setdefault(cat, Counter()).update(kenmerken)
+            self.totalen[cat] += len(kenmerken)
+        self._model = None
+
+    def _bouw(self):
+        """Zet de tellingen om naar log-kansen: (woordenlijst, categorieën, matrix, priors)"""
+        categorieen = sorted(self.documenten)
+        woordenlijst = {}
+        for tellingen in self.tellingen.values():
+            for kenmerk in tellingen:
+                woordenlijst.setdefault(kenmerk, len(woordenlijst))
+
+        # Laatste rij is een lege rij voor transacties zonder bekende kenmerken
+        matrix = np.zeros((len(woordenlijst) + 1, len(categorieen)))
+        for kolom, cat in enumerate(categorieen):
+            noemer = math.log(self.totalen[cat] + self.alpha * len(woordenlijst))
+            matrix[:-1, kolom] = math.log(self.alpha) - noemer
+            for kenmerk, aantal in self.tellingen[cat].items():
+                matrix[woordenlijst[kenmerk], kolom] = math.log(aantal + self.alpha) - noemer
+
+        totaal = sum(self.documenten.values())
+        priors = np.array([math.log(self.documenten[cat] / totaal) for cat in categorieen])
+        self._model = (woordenlijst, categorieen, matrix, priors)
+
+    def voorspel(self, naam, omschrijving, bedrag, top=3):
+        """Voorspel per rij de waarschijnlijkste categorieën.
+
+        Retourneert een DataFrame (zelfde index als omschrijving) met de kolommen
+        categorie, zekerheid (0-1) en suggesties: een lijst (categorie, zekerheid)
+        van hoog naar laag. De zekerheid is gekalibreerd (zie KALIBRATIE), zodat
+        een onbekende tegenpartij niet op bijna 100% uitkomt.
+        """
+        index = omschrijving.index
+        if not self.documenten:
+            return pd.DataFrame({'categorie': None, 'zekerheid': 0.0, 'suggesties': [[] for _ in index]}, index=index)
+        if self._model is None:
+            self._bouw()
+        woordenlijst, categorieen, matrix, priors = self._model
+        leeg = len(woordenlijst)
+
+        sleutels = [_sleutel(n, o, b) for n, o, b in zip(pd.Series(naam, index=index), omschrijving, pd.Series(bedrag, index=index))]
+        uniek = list(dict.fromkeys(sleutels))
+
+        scores, aantallen = [], []
+        for begin in range(0, len(uniek), BLOK):
+            # Per blok de log-kansen van alle kenmerken optellen (elke rij begint met de lege rij)
+            ids, starts = [], []
+            for sleutel in uniek[begin:begin + BLOK]:
+                starts.append(len(ids))
+                ids.append(leeg)
+                ids.extend(woordenlijst[k] for k in _kenmerken(*sleutel) if k in woordenlijst)
+            scores.append(np.add.reduceat(matrix[np.array(ids)], np.array(starts), axis=0))
+            aantallen.append(np.diff(starts + [len(ids)]))
+        # De n-grams zijn sterk gecorreleerd: opgeteld komt de zekerheid bijna altijd op
+        # 100% uit, daarom gemiddeld per kenmerk (plus de lege rij) en gewogen met KALIBRATIE
+        scores = (np.vstack(scores) + priors) / np.concatenate(aantallen)[:, None] * KALIBRATIE
+        kansen = np.exp(scores - scores.max(axis=1, keepdims=True))
+        kansen /= kansen.sum(axis=1, keepdims=True)
+
+        volgorde = np.argsort(-kansen, axis=1)[:, :top]
+        per_sleutel = {
+            sleutel: [(categorieen[j], float(kansen[rij, j])) for j in volgorde[rij]]
+            for rij, sleutel in enumerate(uniek)
+        }
+        suggesties = [per_sleutel[sleutel] for sleutel in sleutels]
+        return pd.DataFrame({
+            'categorie': [s[0][0] for s in suggesties],
+            'zekerheid': [s[0][1] for s in suggesties],
+            'suggesties': suggesties,
+        }, index=index)
@@ -29,11 +29,16 @@ class SaldoBoekCLI:
             print("4. Recente transacties bekijken")
             print("5. Categorieën beheren")
             print("6. Ongecategoriseerde transacties categoriseren")            
-            print("7. Afsluiten")
+            print("7. Importhistorie bekijken")
+            print("8. Transacties zoeken")
+            print("9. Afsluiten")
             keuze = input("Keuze: ").strip()
             if keuze == '1':
                 paths = input("CSV bestand(en) (gescheiden door komma): ").split(',')
-                self.importer.import_transactions_with_categorization([p.strip() for p in paths], self.huidige_gebruiker_id)
+                paths = [p.strip() for p in paths]
+                forceer = input("Eerder geïmporteerde bestanden opnieuw importeren? (j/n): ").strip().lower() == 'j'
+                parallel = len(paths) > 1 and input("Bestanden parallel inlezen? (j/n): ").strip().lower() == 'j'
+                self.importer.import_transactions_with_categorization(paths, self.huidige_gebruiker_id, forceer=forceer, parallel=parallel)
             elif keuze == '2':
                 jaar_input = input("Voor welk jaar wilt u het Excel overzicht (bijv. 2024)? ").strip()
                 if not jaar_input.isdigit():
@@ -59,10 +64,34 @@ class SaldoBoekCLI:
             elif keuze == '6':
                 self.categorizer.categoriseer_bestaande_ongecategoriseerde_transacties(self.huidige_gebruiker_id)                
             elif keuze == '7':
+                try:
+                    aantal = int(input("Hoeveel geïmporteerde bestanden wilt u zien? (standaard 20): ") or "20")
+                except ValueError:
+                    aantal = 20
+                self.db.show_import_history(aantal, self.huidige_gebruiker_id)
+            elif keuze == '8':
+                zoekterm = input("Zoekterm (naam of omschrijving): ").strip()
+                if zoekterm:
+                    self.db.show_search_results(zoekterm, self.huidige_gebruiker_id)
+            elif keuze == '9':
                 break
             else:
                 print("Ongeldige keuze")
 
+    def run_batch(self, gebruiker_naam, paths, forceer=False, parallel=False):
+        """Importeer zonder vragen (cron); retourneert de samenvatting als dict"""
+        from .categorization import Categorizer
+        from .importer import TransactionImporter
+
+        gebruiker = next((u for u in self.db.get_all_users() if u[1] == gebruiker_naam), None)
+        if gebruiker is None:
+            raise ValueError(f"Gebruiker '{gebruiker_naam}' niet gevonden")
+        self.huidige_gebruiker_id, self.huidige_gebruiker_naam = gebruiker
+
+        self.categorizer = Categorizer(self.db, self.huidige_gebruiker_id)
+        self.importer = TransactionImporter(self.categorizer, self.db, self.huidige_gebruiker_id)
+        return self.importer.import_batch(paths, forceer=forceer, parallel=parallel)
+
     def select_user(self):
         while True:
             print("\n=== Gebruikersbeheer ===")
@@ -1,5 +1,60 @@
+# Registry van bankformaten. Elke spec beschrijft hoe een CSV-export van een
+# bank naar het gestandaardiseerde formaat wordt omgezet:
+#
+#   header:          True als de eerste regel kolomnamen bevat
+#   herkenning:      kolomnamen in de header, of (zonder header) het minimale
+#                    aantal velden plus regex-patronen per kolompositie
+#   bestandsnaam:    teksten in de bestandsnaam als de inhoud niet herkend wordt
+#   encodings:       encodings om te proberen als detectie niet lukt
+#   kolommen:        doelkolom -> bronkolom (naam of positie)
+#   omschrijving:    bronkolommen die samen de omschrijving vormen
+#   datum_formaat:   strptime formaat van de datumkolom
+#   decimaal:        decimaalteken van bedragen
+#   duizendtal:      scheidingsteken voor duizendtallen (optioneel)
+#   verplicht:       bronkolommen die aanwezig moeten zijn
+#   min_kolommen:    minimaal aantal aanwezige kolommen (zonder header)
+
 BANK_PARSERS = {
-    'RABO': 'parse_rabo_csv',
-    'SNS': 'parse_sns_csv',
-    # 'ING': 'parse_ing_csv', etc.
+    'RABO': {
+        'naam': 'Rabobank',
+        'header': True,
+        'herkenning': {'kolommen': ['IBAN/BBAN', 'Datum', 'Bedrag']},
+        'bestandsnaam': ['RABO', 'RABOBANK'],
+        'encodings': ['iso-8859-1', 'utf-8', 'cp1252'],
+        'kolommen': {
+            'datum': 'Datum',
+            'rekening': 'IBAN/BBAN',
+            'tegenrekening': 'Tegenrekening IBAN/BBAN',
+            'naam': 'Naam tegenpartij',
+            'valuta': 'Munt',
+            'saldo_voor': 'Saldo na trn',
+            'bedrag': 'Bedrag',
+        },
+        'omschrijving': ['Omschrijving-1', 'Omschrijving-2', 'Omschrijving-3'],
+        'datum_formaat': '%Y-%m-%d',
+        'decimaal': ',',
+        'duizendtal': '.',
+        'verplicht': ['Datum', 'Bedrag', 'IBAN/BBAN'],
+    },
+    'SNS': {
+        'naam': 'SNS Bank',
+        'header': False,
+        'herkenning': {'min_velden': 18, 'patronen': {0: r'^\d{2}-\d{2}-\d{4}$'}},
+        'bestandsnaam': ['SNS'],
+        'encodings': ['utf-8'],
+        'kolommen': {
+            'datum': 0,
+            'rekening': 1,
+            'tegenrekening': 2,
+            'naam': 3,
+            'valuta': 7,
+            'saldo_voor': 8,
+            'bedrag': 10,
+        },
+        'omschrijving': [17],
+        'datum_formaat': '%d-%m-%Y',
+        'decimaal': '.',
+        'min_kolommen': 6,
+    },
+    # 'ING': {...}, etc.
 }
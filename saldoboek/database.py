@@ -1,6 +1,14 @@
 import sqlite3
+import hashlib
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 import pandas as pd
 import yaml
+from .bedragen import CENT, euro
 from pathlib import Path
 
 # Get the directory where this script is located
@@ -12,17 +20,225 @@ DB_PATH = DATA_DIR / "database.db"
 # Config directory path
 CONFIG_DIR = SCRIPT_DIR / "config"
 
+def _tekst(waarde):
+    """Zet een mogelijk lege waarde (None/NaN) om naar genormaliseerde tekst"""
+    if waarde is None or waarde != waarde:
+        return ''
+    return ' '.join(str(waarde).split())
+
+def transactie_fingerprint(gebruiker_id, datum, rekening, bedrag, omschrijving):
+    """Hash van de genormaliseerde natuurlijke sleutel van een transactie (bedrag in centen)"""
+    try:
+        bedrag = f"{euro(int(bedrag)):.2f}"
+    except (TypeError, ValueError):
+        bedrag = ''
+    sleutel = '|'.join([
+        str(gebruiker_id),
+        _tekst(datum)[:10],
+        _tekst(rekening).upper(),
+        bedrag,
+        _tekst(omschrijving),
+    ])
+    return hashlib.sha1(sleutel.encode('utf-8')).hexdigest()
+
+# Kolommen van transacties; bedrag en saldo_voor in hele centen,
+# rekening en categorie als verwijzing naar de tabellen rekeningen en categorieen
+TRANSACTIES_KOLOMMEN = '''
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    gebruiker_id INTEGER,
+    datum DATE,
+    rekening_id INTEGER REFERENCES rekeningen(id),
+    tegenrekening TEXT,
+    naam TEXT,
+    omschrijving TEXT,
+    bedrag INTEGER,
+    saldo_voor INTEGER,
+    valuta TEXT,
+    categorie_id INTEGER REFERENCES categorieen(id),
+    rekeningtype TEXT,
+    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fingerprint TEXT
+'''
+
+# Transacties met de IBAN en categorienaam erbij; om te lezen, schrijven gaat via de ids
+TRANSACTIES_OVERZICHT = '''
+    CREATE VIEW IF NOT EXISTS transacties_overzicht AS
+    SELECT t.id, t.gebruiker_id, t.datum, t.rekening_id, r.iban AS rekening, t.tegenrekening,
+           t.naam, t.omschrijving, t.bedrag, t.saldo_voor, t.valuta,
+           t.categorie_id, c.naam AS categorie, t.rekeningtype, t.imported_at, t.fingerprint
+    FROM transacties t
+    LEFT JOIN rekeningen r ON r.id = t.rekening_id
+    LEFT JOIN categorieen c ON c.id = t.categorie_id
+'''
+
+# Oude tekstkolommen die naar de dimensietabellen worden omgezet
+DIMENSIE_KOLOMMEN = ('rekening', 'categorie')
+
+# Schemamigraties in volgorde: (versie, omschrijving, voorbereiding, blok, afronding),
+# met namen van methoden van DatabaseManager. Het blok vult per MIGRATIE_BLOK transacties
+# in een eigen transactie; voortgang wordt gemeld na elke MIGRATIE_MELDING seconden.
+# Een nieuwe migratie komt achteraan met het volgende versienummer.
+MIGRATIE_BLOK = 10000
+MIGRATIE_MELDING = 2
+MIGRATIES = (
+    (1, 'bedragen naar centen', '_migrate_amounts', '_kopieer_bedragen', '_wissel_transacties'),
+    (2, 'kolommen rekening_id en categorie_id', '_migrate_dimension_columns', None, None),
+    (3, 'fingerprints', '_migrate_fingerprints', '_vul_fingerprints', None),
+    (4, 'datums naar JJJJ-MM-DD', '_migrate_dates', '_normaliseer_datums', None),
+    (5, 'rekening en categorie naar verwijzingen', '_migrate_dimensions', '_vul_dimensies', '_verwijder_dimensie_kolommen'),
+    (6, 'zoekindex', '_migrate_fts', '_vul_zoekindex', None),
+    (7, 'maandtotalen', '_migrate_month_totals', '_tel_maandtotalen', None),
+    (8, 'geraden rekeningtypes', '_migrate_guessed_account_types', '_vul_rekeningtypes', None),
+    (9, 'categorietypes', '_migrate_category_types', None, None),
+    (10, 'vaste categorie Ongecategoriseerd', '_migrate_uncategorized', None, None),
+)
+
+# Datums staan als 'YYYY-MM-DD' tekst, zodat ze sorteren en met een index te filteren zijn
+DATUM_ISO = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+DATUM_FORMATEN = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d', '%d.%m.%Y', '%Y%m%d')
+
+def normaliseer_datum(waarde):
+    """Zet een datum (ook met tijd, of als getal 20240131) om naar 'YYYY-MM-DD'; None als dat niet lukt"""
+    tekst = _tekst(waarde)
+    if not tekst:
+        return None
+    deel = tekst.split()[0].split('T')[0]
+    for formaat in DATUM_FORMATEN:
+        try:
+            return datetime.strptime(deel, formaat).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+def jaar_bereik(jaar):
+    """Halfopen datumbereik [begin, eind) van een jaar, voor een vergelijking die de index gebruikt"""
+    return f"{int(jaar):04d}-01-01", f"{int(jaar) + 1:04d}-01-01"
+
+# Sleutel en kolommen van maandtotalen; lege datum wordt '', lege rekening/categorie 0
+MAANDTOTALEN_KOLOMMEN = 'gebruiker_id, maand, rekening_id, categorie_id, inkomsten, uitgaven, aantal_in, aantal_uit, aantal'
+MAANDTOTALEN_SLEUTEL = (
+    "{0}.gebruiker_id, coalesce(substr({0}.datum, 1, 7), ''), coalesce({0}.rekening_id, 0), coalesce({0}.categorie_id, 0)"
+)
+MAANDTOTALEN_OPTELLEN = '''
+    ON CONFLICT (gebruiker_id, maand, rekening_id, categorie_id) DO UPDATE SET
+        inkomsten = inkomsten + excluded.inkomsten, uitgaven = uitgaven + excluded.uitgaven,
+        aantal_in = aantal_in + excluded.aantal_in, aantal_uit = aantal_uit + excluded.aantal_uit,
+        aantal = aantal + excluded.aantal'''
+
+def _maandtotalen_delta(rij, teken):
+    """Triggerstatement dat transactie `rij` (new/old) optelt bij ('') of aftrekt van ('-') maandtotalen"""
+    bedrag = f"coalesce({rij}.bedrag, 0)"
+    return f'''
+        INSERT INTO maandtotalen ({MAANDTOTALEN_KOLOMMEN})
+        SELECT {MAANDTOTALEN_SLEUTEL.format(rij)},
+               {teken}max({bedrag}, 0), {teken}max(-{bedrag}, 0), {teken}({bedrag} > 0), {teken}({bedrag} < 0), {teken}1
+        WHERE {rij}.gebruiker_id IS NOT NULL
+        {MAANDTOTALEN_OPTELLEN};'''
+
+def _maandtotalen_opruimen(rij):
+    """Triggerstatement dat de rij van transactie `rij` in maandtotalen verwijdert als die leeg is"""
+    return f'''
+        DELETE FROM maandtotalen
+        WHERE (gebruiker_id, maand, rekening_id, categorie_id) = ({MAANDTOTALEN_SLEUTEL.format(rij)}) AND aantal = 0;'''
+
+# Tekst in de zoekindex; triggers draaien ook op verbindingen zonder Python functies
+FTS_TEKST = "coalesce({0}.naam, '') || ' ' || coalesce({0}.omschrijving, '')"
+FTS_MIN_LENGTE = 3
+
+# Vaste instellingen per verbinding; WAL laat lezers doorgaan tijdens een import
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -32000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+STATEMENT_CACHE = 256
+
+logger = logging.getLogger(__name__)
+
+# Vaste categorie voor transacties zonder categorie: zonder type en niet te kiezen
+ONGECATEGORISEERD = 'Ongecategoriseerd'
+
+def categorie_type(bedrag):
+    """Type van een categorie bij een (totaal)bedrag in centen: positief is inkomsten, anders uitgaven"""
+    return 'inkomsten' if bedrag > 0 else 'uitgaven'
+
+def categorie_tekst(naam, omschrijving):
+    """De tekst waarin categorisatieregels zoeken (kleine letters)"""
+    return f"{naam} {omschrijving}".lower()
+
 class DatabaseManager:
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
         self.config_dir = CONFIG_DIR
+        self._lokaal = threading.local()
+        self._verbindingen = []
+        self._verbindingen_lock = threading.Lock()
         # Ensure the data directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._initialize()
         print(f"[DEBUG] Gebruikte database: {self.db_path}")
 
     def _connect(self):
-        return sqlite3.connect(self.db_path, timeout=10)
+        """Geef de vaste verbinding van deze thread; wordt bij eerste gebruik geopend.
+
+        Elke thread krijgt één eigen verbinding, die open blijft tot close().
+        Zo blijven pragmas, de page cache en de cache van voorbereide
+        statements behouden tussen aanroepen.
+        """
+        conn = getattr(self._lokaal, 'conn', None)
+        if conn is not None:
+            return conn
+
+        # threading.local houdt elke verbinding bij zijn eigen thread; check_same_thread=False
+        # is er alleen voor close(), dat alle verbindingen vanuit één thread sluit
+        conn = sqlite3.connect(self.db_path, timeout=10, cached_statements=STATEMENT_CACHE, check_same_thread=False)
+        for pragma, waarde in PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {waarde}")
+        # Zelfde tekst als de Categorizer, zodat SQL precies dezelfde rijen vindt
+        conn.create_function('categorie_tekst', 2, categorie_tekst, deterministic=True)
+        self._lokaal.conn = conn
+        self._lokaal.diepte = 0
+        with self._verbindingen_lock:
+            self._verbindingen.append(conn)
+        return conn
+
+    def close(self):
+        """Sluit alle verbindingen; SQLite verwerkt daarbij het WAL-bestand in de database"""
+        with self._verbindingen_lock:
+            verbindingen, self._verbindingen = self._verbindingen, []
+        for conn in verbindingen:
+            conn.close()
+        self._lokaal = threading.local()
+
+    @contextmanager
+    def transaction(self):
+        """Geef een verbinding waarop alle writes in één transactie worden gecommit.
+
+        De transactie neemt direct de schrijfvergrendeling (BEGIN IMMEDIATE).
+        Een genest blok, ook via execute(), hoort bij de buitenste transactie.
+        """
+        conn = self._connect()
+        if self._lokaal.diepte:
+            self._lokaal.diepte += 1
+            try:
+                yield conn
+            finally:
+                self._lokaal.diepte -= 1
+            return
+
+        conn.execute('BEGIN IMMEDIATE')
+        self._lokaal.diepte = 1
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._lokaal.diepte = 0
 
     def _load_categories_config(self):
         """Laad categorieën uit YAML configuratie"""
@@ -68,29 +284,18 @@ class DatabaseManager:
             return []
 
     def _initialize(self):
-        """Initialiseer de database met benodigde tabellen"""
-        with sqlite3.connect(self.db_path, timeout=10) as conn:
+        """Initialiseer de database: tabellen aanmaken, migraties uitvoeren en triggers zetten"""
+        with self.transaction() as conn:
             cursor = conn.cursor()
         
-            # Transacties tabel
+            # Gebruikers tabel
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS transacties (
+                CREATE TABLE IF NOT EXISTS gebruikers (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    gebruiker_id INTEGER,
-                    datum DATE,
-                    rekening TEXT,
-                    tegenrekening TEXT,
-                    naam TEXT,
-                    omschrijving TEXT,
-                    bedrag REAL,
-                    saldo_voor REAL,
-                    valuta TEXT,
-                    categorie TEXT,
-                    rekeningtype TEXT,
-                    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    naam TEXT NOT NULL UNIQUE
                 )
             ''')
-            
+        
             # Categorieën tabel
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS categorieen (
@@ -103,6 +308,23 @@ class DatabaseManager:
                 )
             ''')
         
+            # Rekeningen met hun rekeningtype, voor import zonder vragen;
+            # geraden = type door een headless import bepaald, nog niet door de gebruiker gekozen
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS rekeningen (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    gebruiker_id INTEGER NOT NULL,
+                    iban TEXT NOT NULL,
+                    rekeningtype TEXT,
+                    geraden BOOLEAN NOT NULL DEFAULT 0,
+                    UNIQUE(iban, gebruiker_id)
+                )
+            ''')
+
+            # Transacties tabel, met verwijzingen naar rekeningen en categorieen.
+            # Een bestaande tabel wordt door de migraties bijgewerkt
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS transacties ({TRANSACTIES_KOLOMMEN})")
+
             # Categorisatie regels tabel
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS categorisatie_regels (
@@ -116,24 +338,602 @@ class DatabaseManager:
                 );
             ''')
             
-            # Gebruikers tabel
+            # Regels op tegenrekening (IBAN), exacte match
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS gebruikers (
+                CREATE TABLE IF NOT EXISTS iban_regels (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    naam TEXT NOT NULL UNIQUE
+                    iban TEXT NOT NULL,
+                    categorie TEXT,
+                    gebruiker_id INTEGER,
+                    actief BOOLEAN DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(iban, gebruiker_id)
                 )
             ''')
-        
+
+            # Import ledger: eerder geïmporteerde bestanden op inhoud-hash
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS geimporteerde_bestanden (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    gebruiker_id INTEGER,
+                    bestand_hash TEXT NOT NULL,
+                    bestandsnaam TEXT,
+                    bank TEXT,
+                    rekening TEXT,
+                    aantal_rijen INTEGER,
+                    aantal_nieuw INTEGER,
+                    datum_van DATE,
+                    datum_tot DATE,
+                    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(bestand_hash, gebruiker_id)
+                )
+            ''')
+
+            # Cursor van de mapbewaker: laatst verwerkte versie per bestand
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS bewaakte_bestanden (
+                    pad TEXT PRIMARY KEY,
+                    gebruiker_id INTEGER,
+                    grootte INTEGER,
+                    gewijzigd REAL,
+                    status TEXT,
+                    verwerkt_op TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Uitgevoerde schemamigraties (zie MIGRATIES), met voortgang in transactie-ids
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migraties (
+                    versie INTEGER PRIMARY KEY,
+                    omschrijving TEXT,
+                    voortgang INTEGER NOT NULL DEFAULT 0,
+                    aangepast INTEGER NOT NULL DEFAULT 0,
+                    duur REAL NOT NULL DEFAULT 0,
+                    klaar BOOLEAN NOT NULL DEFAULT 0,
+                    gestart_op TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    klaar_op TIMESTAMP
+                )
+            ''')
+
+            self._migrate_rule_versions(cursor)
+
             # Laad categorisatie regels uit configuratie
-            standaard_regels = self._load_rules_config()
-            for regel in standaard_regels:
-                cursor.execute('INSERT OR IGNORE INTO categorisatie_regels (zoekterm, categorie) VALUES (?, ?)', regel)
-            
-            conn.commit()
+            self._insert_default_rules(cursor)
+
+        # Buiten de transactie hierboven: migraties gebruiken eigen, korte transacties
+        self._migreer()
+
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(TRANSACTIES_OVERZICHT)
+            self.fts = self._maak_triggers(cursor)
+
+    def get_schema_version(self):
+        """Hoogste schemaversie waarvan de migratie klaar is (0 als er nog geen is)"""
+        conn = self._connect()
+        return conn.execute('SELECT coalesce(MAX(versie), 0) FROM schema_migraties WHERE klaar = 1').fetchone()[0]
+
+    def _migreer(self):
+        """Voer de migraties uit MIGRATIES die nog niet klaar zijn in volgorde uit"""
+        conn = self._connect()
+        klaar = {versie for (versie,) in conn.execute('SELECT versie FROM schema_migraties WHERE klaar = 1')}
+        for migratie in MIGRATIES:
+            if migratie[0] not in klaar:
+                self._voer_migratie_uit(*migratie)
+
+    def _voer_migratie_uit(self, versie, omschrijving, voorbereiding, blok, afronding):
+        """Voer één migratie uit, of maak een onderbroken migratie af.
+
+        De voorbereiding (de schemawijziging) draait in één transactie en geeft
+        terug of er iets te vullen is. Het vullen gebeurt per blok van
+        MIGRATIE_BLOK transacties, elk in een eigen korte transactie die ook de
+        voortgang vastlegt; na een onderbreking gaat het verder na het laatst
+        verwerkte id. Het laatste blok en de afronding delen een transactie.
+        De voortgang wordt tussendoor gemeld, de duur staat in schema_migraties.
+        """
+        begin = time.perf_counter()
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            rij = cursor.execute('SELECT voortgang, klaar FROM schema_migraties WHERE versie = ?', (versie,)).fetchone()
+            if rij is None:
+                nodig = getattr(self, voorbereiding)(cursor)
+                cursor.execute(
+                    'INSERT INTO schema_migraties (versie, omschrijving, duur) VALUES (?, ?, ?)',
+                    (versie, omschrijving, time.perf_counter() - begin)
+                )
+                if not nodig:
+                    cursor.execute('UPDATE schema_migraties SET klaar = 1, klaar_op = CURRENT_TIMESTAMP WHERE versie = ?', (versie,))
+                    return
+                voortgang = 0
+            elif rij[1]:
+                # Inmiddels door een ander proces afgemaakt
+                return
+            else:
+                voortgang = rij[0]
+                logger.info("Migratie %s (%s) gaat verder na transactie %s", versie, omschrijving, voortgang)
+            totaal = cursor.execute('SELECT COUNT(*) FROM transacties WHERE id > ?', (voortgang,)).fetchone()[0] if blok else 0
+
+        if totaal:
+            print(f"Migratie {versie}: {omschrijving} ({totaal} transacties)")
+        verwerkt = 0
+        gemeld = time.perf_counter()
+        while True:
+            start = time.perf_counter()
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                voortgang, klaar = cursor.execute(
+                    'SELECT voortgang, klaar FROM schema_migraties WHERE versie = ?', (versie,)
+                ).fetchone()
+                if klaar:
+                    return
+                tot, aantal = None, 0
+                if blok:
+                    tot, aantal = cursor.execute(
+                        'SELECT MAX(id), COUNT(*) FROM (SELECT id FROM transacties WHERE id > ? ORDER BY id LIMIT ?)',
+                        (voortgang, MIGRATIE_BLOK)
+                    ).fetchone()
+                aangepast = getattr(self, blok)(cursor, voortgang, tot) if aantal else 0
+                laatste = aantal < MIGRATIE_BLOK
+                if laatste and afronding:
+                    getattr(self, afronding)(cursor)
+                cursor.execute(
+                    '''
+                    UPDATE schema_migraties SET
+                        voortgang = coalesce(?, voortgang), aangepast = aangepast + ?, duur = duur + ?,
+                        klaar = ?, klaar_op = CASE WHEN ? THEN CURRENT_TIMESTAMP END
+                    WHERE versie = ?
+                    ''',
+                    (tot, aangepast, time.perf_counter() - start, laatste, laatste, versie)
+                )
+            verwerkt += aantal
+            if laatste:
+                break
+            if time.perf_counter() - gemeld >= MIGRATIE_MELDING:
+                print(f"  {verwerkt}/{totaal} transacties ({verwerkt / totaal:.0%})")
+                gemeld = time.perf_counter()
+
+        if totaal:
+            aangepast, duur = conn.execute(
+                'SELECT aangepast, duur FROM schema_migraties WHERE versie = ?', (versie,)
+            ).fetchone()
+            print(f"✓ Migratie {versie} klaar: {aangepast} rijen aangepast in {duur:.1f}s")
+
+    def _insert_default_rules(self, cursor):
+        """Voeg standaardregels uit de configuratie toe die nog niet bestaan.
+
+        UNIQUE(zoekterm, gebruiker_id) houdt standaardregels (gebruiker_id NULL)
+        niet tegen, dus hier expliciet controleren.
+        """
+        for zoekterm, categorie in self._load_rules_config():
+            cursor.execute(
+                """
+                INSERT INTO categorisatie_regels (zoekterm, categorie)
+                SELECT ?, ? WHERE NOT EXISTS (
+                    SELECT 1 FROM categorisatie_regels WHERE zoekterm = ? AND gebruiker_id IS NULL
+                )
+                """,
+                (zoekterm, categorie, zoekterm)
+            )
+
+    def _migrate_rule_versions(self, cursor):
+        """Houd per gebruiker (0 voor standaardregels) een versienummer van de regels bij.
+
+        Triggers hogen de versie op bij elke wijziging in categorisatie_regels
+        of iban_regels, ook vanuit andere processen. Zo ziet een Categorizer met
+        één query of zijn gecompileerde regels nog actueel zijn.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS regelversies (
+                gebruiker_id INTEGER PRIMARY KEY,
+                versie INTEGER NOT NULL
+            )
+        ''')
+        verhoog = (
+            "INSERT INTO regelversies (gebruiker_id, versie) VALUES (coalesce({0}.gebruiker_id, 0), 1) "
+            "ON CONFLICT(gebruiker_id) DO UPDATE SET versie = versie + 1;"
+        )
+        for tabel in ('categorisatie_regels', 'iban_regels'):
+            for actie, rij in (('insert', 'new'), ('update', 'new'), ('delete', 'old')):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {tabel}_versie_{actie} AFTER {actie.upper()} ON {tabel} BEGIN
+                        {verhoog.format(rij)}
+                    END
+                ''')
+
+    def _migrate_amounts(self, cursor):
+        """Zet bedrag en saldo_voor om van REAL (euro) naar INTEGER (centen).
+
+        SQLite kan het type van een kolom niet wijzigen, dus de tabel wordt met
+        dezelfde ids opnieuw opgebouwd als transacties_nieuw: de blokken kopiëren
+        de rijen, de afronding wisselt de tabellen om. Indexen maken de migraties
+        hierna weer aan, triggers _maak_triggers.
+        """
+        kolommen = {kolom[1]: kolom[2].upper() for kolom in cursor.execute('PRAGMA table_info(transacties)')}
+        if kolommen.get('bedrag') != 'REAL':
+            return False
+
+        # Oude kolommen die nog omgezet moeten worden (rekening, categorie) gaan mee naar de nieuwe tabel
+        nieuwe_kolommen = [regel.split()[0] for regel in TRANSACTIES_KOLOMMEN.strip().splitlines()]
+        extra = ''.join(f", {kolom} {type_}" for kolom, type_ in kolommen.items() if kolom not in nieuwe_kolommen)
+        cursor.execute('DROP TABLE IF EXISTS transacties_nieuw')
+        cursor.execute(f"CREATE TABLE transacties_nieuw ({TRANSACTIES_KOLOMMEN}{extra})")
+        return True
+
+    def _kopieer_bedragen(self, cursor, vanaf, tot):
+        """Kopieer een blok transacties naar transacties_nieuw, met bedragen in centen"""
+        kolommen = [kolom[1] for kolom in cursor.execute('PRAGMA table_info(transacties)')]
+        selectie = [f"CAST(round({kolom} * {CENT}) AS INTEGER)" if kolom in ('bedrag', 'saldo_voor') else kolom
+                    for kolom in kolommen]
+        return cursor.execute(
+            f"INSERT INTO transacties_nieuw ({', '.join(kolommen)}) "
+            f"SELECT {', '.join(selectie)} FROM transacties WHERE id > ? AND id <= ?",
+            (vanaf, tot)
+        ).rowcount
+
+    def _wissel_transacties(self, cursor):
+        """Vervang transacties door de opnieuw opgebouwde transacties_nieuw"""
+        cursor.execute('DROP TABLE transacties')
+        cursor.execute('ALTER TABLE transacties_nieuw RENAME TO transacties')
+
+    def _migrate_fingerprints(self, cursor):
+        """Voeg de fingerprint kolom toe aan bestaande databases, met de unieke index"""
+        kolommen = [kolom[1] for kolom in cursor.execute('PRAGMA table_info(transacties)')]
+        if 'fingerprint' not in kolommen:
+            cursor.execute('ALTER TABLE transacties ADD COLUMN fingerprint TEXT')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_transacties_fingerprint ON transacties(fingerprint)')
+        return True
+
+    def _vul_fingerprints(self, cursor, vanaf, tot):
+        """Bereken de fingerprint voor transacties in een blok die er nog geen hebben.
+
+        Oude duplicaten houden geen fingerprint: de unieke index slaat de
+        update van een latere transactie met dezelfde sleutel over.
+        """
+        cursor.execute(
+            f'''
+            SELECT id, gebruiker_id, datum, {self._rekening_sql(cursor)}, bedrag, omschrijving FROM transacties
+            WHERE id > ? AND id <= ? AND fingerprint IS NULL ORDER BY id
+            ''',
+            (vanaf, tot)
+        )
+        updates = [(transactie_fingerprint(*sleutel), id_) for id_, *sleutel in cursor.fetchall()]
+        if not updates:
+            return 0
+        cursor.executemany('UPDATE OR IGNORE transacties SET fingerprint = ? WHERE id = ?', updates)
+        return cursor.rowcount
+
+    def _migrate_dates(self, cursor):
+        """Maak de index op (gebruiker_id, datum); datums worden per blok omgezet"""
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_transacties_gebruiker_datum ON transacties(gebruiker_id, datum)')
+        return True
+
+    def _normaliseer_datums(self, cursor, vanaf, tot):
+        """Zet afwijkende datums in een blok om naar 'YYYY-MM-DD'.
+
+        Rijen die al goed staan worden overgeslagen. De fingerprint van
+        omgezette rijen wordt opnieuw berekend, behalve als die dan gelijk
+        wordt aan een bestaande transactie.
+        """
+        cursor.execute(
+            f'''
+            SELECT id, gebruiker_id, datum, {self._rekening_sql(cursor)}, bedrag, omschrijving FROM transacties
+            WHERE id > ? AND id <= ?
+              AND datum IS NOT NULL AND (typeof(datum) != 'text' OR length(datum) != 10 OR datum NOT GLOB ?)
+            ''',
+            (vanaf, tot, DATUM_ISO)
+        )
+        updates = []
+        onleesbaar = 0
+        for id_, gebruiker_id, datum, rekening, bedrag, omschrijving in cursor.fetchall():
+            nieuwe_datum = normaliseer_datum(datum)
+            if nieuwe_datum is None:
+                onleesbaar += 1
+                continue
+            updates.append((nieuwe_datum, transactie_fingerprint(gebruiker_id, nieuwe_datum, rekening, bedrag, omschrijving), id_))
+        if onleesbaar:
+            print(f"Warning: {onleesbaar} transacties hebben een datum die niet kon worden omgezet")
+        if updates:
+            cursor.executemany('UPDATE transacties SET datum = ? WHERE id = ?', [(datum, id_) for datum, _, id_ in updates])
+            cursor.executemany('UPDATE OR IGNORE transacties SET fingerprint = ? WHERE id = ?', [(fp, id_) for _, fp, id_ in updates])
+        return len(updates)
+
+    def _rekening_sql(self, cursor):
+        """SQL voor de IBAN van een transactie, ook zolang de oude kolom rekening nog bestaat"""
+        via_id = '(SELECT r.iban FROM rekeningen r WHERE r.id = transacties.rekening_id)'
+        kolommen = [kolom[1] for kolom in cursor.execute('PRAGMA table_info(transacties)')]
+        return f'coalesce(rekening, {via_id})' if 'rekening' in kolommen else via_id
+
+    def _migrate_dimension_columns(self, cursor):
+        """Voeg rekening_id en categorie_id toe aan bestaande databases, met een index op (gebruiker, categorie).
+
+        Het vullen vanuit de oude tekstkolommen is migratie 5 (_vul_dimensies).
+        """
+        kolommen = [kolom[1] for kolom in cursor.execute('PRAGMA table_info(transacties)')]
+        for kolom, tabel in (('rekening_id', 'rekeningen'), ('categorie_id', 'categorieen')):
+            if kolom not in kolommen:
+                cursor.execute(f'ALTER TABLE transacties ADD COLUMN {kolom} INTEGER REFERENCES {tabel}(id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_transacties_gebruiker_categorie ON transacties(gebruiker_id, categorie_id)')
+        return False
+
+    def _migrate_dimensions(self, cursor):
+        """Bereid het omzetten van de oude tekstkolommen rekening en categorie voor.
+
+        De triggers van maandtotalen op rekening- en categorienaam verwijzen
+        naar die kolommen en gaan daarom eerst weg; migratie 7 bouwt
+        maandtotalen opnieuw op.
+        """
+        kolommen = [kolom[1] for kolom in cursor.execute('PRAGMA table_info(transacties)')]
+        if not all(kolom in kolommen for kolom in DIMENSIE_KOLOMMEN):
+            return False
+        if 'rekening' in [kolom[1] for kolom in cursor.execute('PRAGMA table_info(maandtotalen)')]:
+            for actie in ('insert', 'delete', 'update'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS transacties_maandtotalen_{actie}')
+        return True
+
+    def _vul_dimensies(self, cursor, vanaf, tot):
+        """Zet rekening en categorie van een blok transacties om naar rekening_id en categorie_id.
+
+        Onbekende rekeningen en categorieën worden per gebruiker toegevoegd.
+        De oude kolommen worden daarbij leeggemaakt.
+        """
+        bereik = 'id > ? AND id <= ?'
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO rekeningen (gebruiker_id, iban, rekeningtype)
+            SELECT gebruiker_id, rekening, MAX(rekeningtype) FROM transacties
+            WHERE {bereik} AND rekening IS NOT NULL AND gebruiker_id IS NOT NULL
+            GROUP BY gebruiker_id, rekening
+        ''', (vanaf, tot))
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO categorieen (naam, gebruiker_id)
+            SELECT DISTINCT categorie, gebruiker_id FROM transacties
+            WHERE {bereik} AND categorie IS NOT NULL AND gebruiker_id IS NOT NULL
+        ''', (vanaf, tot))
+        return cursor.execute(f'''
+            UPDATE transacties SET
+                rekening_id = coalesce((SELECT r.id FROM rekeningen r
+                                        WHERE r.iban = transacties.rekening AND r.gebruiker_id = transacties.gebruiker_id), rekening_id),
+                categorie_id = coalesce((SELECT c.id FROM categorieen c
+                                         WHERE c.naam = transacties.categorie AND c.gebruiker_id = transacties.gebruiker_id), categorie_id),
+                rekening = NULL,
+                categorie = NULL
+            WHERE {bereik} AND (rekening IS NOT NULL OR categorie IS NOT NULL)
+        ''', (vanaf, tot)).rowcount
+
+    def _verwijder_dimensie_kolommen(self, cursor):
+        """Verwijder de omgezette kolommen rekening en categorie; lukt dat niet, dan blijven ze leeg staan"""
+        cursor.execute('SAVEPOINT dimensie_kolommen')
+        try:
+            for kolom in DIMENSIE_KOLOMMEN:
+                cursor.execute(f'ALTER TABLE transacties DROP COLUMN {kolom}')
+        except sqlite3.OperationalError as e:
+            cursor.execute('ROLLBACK TO dimensie_kolommen')
+            print(f"Warning: oude kolommen rekening en categorie konden niet worden verwijderd ({e}); ze blijven leeg staan")
+        cursor.execute('RELEASE dimensie_kolommen')
+
+    def _migrate_fts(self, cursor):
+        """Maak de FTS5 zoekindex over naam en omschrijving aan.
+
+        De index is contentless (de tekst staat al in transacties) en gebruikt de
+        trigram tokenizer, zodat ook delen van woorden gevonden worden, net als
+        bij de categorisatieregels. Zonder FTS5 wordt er zonder index gezocht.
+        """
+        if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'transacties_fts'").fetchone():
+            return False
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE transacties_fts USING fts5(tekst, content='', tokenize='trigram')")
+        except sqlite3.OperationalError as e:
+            print(f"Warning: zoekindex niet beschikbaar ({e}), zoeken gebeurt zonder index")
+            return False
+        return True
+
+    def _vul_zoekindex(self, cursor, vanaf, tot):
+        """Neem een blok bestaande transacties op in de zoekindex"""
+        return cursor.execute(
+            f"INSERT INTO transacties_fts (rowid, tekst) SELECT id, {FTS_TEKST.format('transacties')} FROM transacties "
+            "WHERE id > ? AND id <= ?",
+            (vanaf, tot)
+        ).rowcount
+
+    def _migrate_month_totals(self, cursor):
+        """Maak de tabel maandtotalen aan.
+
+        Per (gebruiker, maand, rekening_id, categorie_id) staan de som van bij- en
+        afschrijvingen (in centen, beide positief) en de aantallen. Een nieuwe
+        tabel wordt per blok gevuld vanuit de bestaande transacties; een tabel op
+        rekening- en categorienaam (van voor rekening_id/categorie_id) wordt
+        vervangen. De triggers die hem bijhouden zet _maak_triggers.
+        """
+        kolommen = [kolom[1] for kolom in cursor.execute('PRAGMA table_info(maandtotalen)')]
+        if 'rekening_id' in kolommen:
+            return False
+        if 'rekening' in kolommen:
+            for actie in ('insert', 'delete', 'update'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS transacties_maandtotalen_{actie}')
+            cursor.execute('DROP TABLE maandtotalen')
+        cursor.execute('''
+            CREATE TABLE maandtotalen (
+                gebruiker_id INTEGER NOT NULL,
+                maand TEXT NOT NULL,
+                rekening_id INTEGER NOT NULL,
+                categorie_id INTEGER NOT NULL,
+                inkomsten INTEGER NOT NULL DEFAULT 0,
+                uitgaven INTEGER NOT NULL DEFAULT 0,
+                aantal_in INTEGER NOT NULL DEFAULT 0,
+                aantal_uit INTEGER NOT NULL DEFAULT 0,
+                aantal INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (gebruiker_id, maand, rekening_id, categorie_id)
+            ) WITHOUT ROWID
+        ''')
+        return True
+
+    def _tel_maandtotalen(self, cursor, vanaf, tot):
+        """Tel een blok transacties op bij maandtotalen"""
+        return cursor.execute(f'''
+            INSERT INTO maandtotalen ({MAANDTOTALEN_KOLOMMEN})
+            SELECT {MAANDTOTALEN_SLEUTEL.format('t')},
+                   SUM(max(coalesce(bedrag, 0), 0)), SUM(max(-coalesce(bedrag, 0), 0)),
+                   SUM(bedrag > 0), SUM(bedrag < 0), COUNT(*)
+            FROM transacties t
+            WHERE t.id > ? AND t.id <= ? AND t.gebruiker_id IS NOT NULL
+            GROUP BY 1, 2, 3, 4
+            {MAANDTOTALEN_OPTELLEN}
+        ''', (vanaf, tot)).rowcount
+
+    def _migrate_guessed_account_types(self, cursor):
+        """Voeg de kolom geraden toe aan rekeningen.
+
+        Headless imports sloegen het geraden rekeningtype niet op; die
+        rekeningen krijgen per blok het type van hun transacties, als geraden.
+        """
+        kolommen = [kolom[1] for kolom in cursor.execute('PRAGMA table_info(rekeningen)')]
+        if 'geraden' not in kolommen:
+            cursor.execute('ALTER TABLE rekeningen ADD COLUMN geraden BOOLEAN NOT NULL DEFAULT 0')
+        return cursor.execute('SELECT 1 FROM rekeningen WHERE rekeningtype IS NULL LIMIT 1').fetchone() is not None
+
+    def _vul_rekeningtypes(self, cursor, vanaf, tot):
+        """Geef rekeningen zonder type het rekeningtype van hun transacties in een blok"""
+        return cursor.execute('''
+            UPDATE rekeningen SET geraden = 1, rekeningtype = (
+                SELECT MAX(t.rekeningtype) FROM transacties t
+                WHERE t.id > ? AND t.id <= ? AND t.rekening_id = rekeningen.id
+            )
+            WHERE rekeningtype IS NULL AND EXISTS (
+                SELECT 1 FROM transacties t
+                WHERE t.id > ? AND t.id <= ? AND t.rekening_id = rekeningen.id AND t.rekeningtype IS NOT NULL
+            )
+        ''', (vanaf, tot, vanaf, tot)).rowcount
+
+    def _migrate_category_types(self, cursor):
+        """Geef categorieën zonder type (automatisch aangemaakt) het type van hun totaal in maandtotalen"""
+        cursor.execute('''
+            UPDATE categorieen SET type = (
+                SELECT CASE WHEN coalesce(SUM(m.inkomsten) - SUM(m.uitgaven), 0) > 0 THEN 'inkomsten' ELSE 'uitgaven' END
+                FROM maandtotalen m WHERE m.gebruiker_id = categorieen.gebruiker_id AND m.categorie_id = categorieen.id
+            )
+            WHERE type IS NULL AND naam != ?
+        ''', (ONGECATEGORISEERD,))
+        return False
+
+    def _migrate_uncategorized(self, cursor):
+        """Maak 'Ongecategoriseerd' voor elke gebruiker een vaste categorie zonder type"""
+        cursor.execute('UPDATE categorieen SET type = NULL WHERE naam = ?', (ONGECATEGORISEERD,))
+        cursor.execute(
+            'INSERT OR IGNORE INTO categorieen (naam, gebruiker_id) SELECT ?, id FROM gebruikers',
+            (ONGECATEGORISEERD,)
+        )
+        return False
+
+    def _maak_triggers(self, cursor):
+        """Zet de triggers op transacties voor de zoekindex en maandtotalen.
+
+        Na de migraties, omdat een migratie die transacties opnieuw opbouwt de
+        triggers kwijtraakt. Retourneert of de zoekindex er is.
+        """
+        fts = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'transacties_fts'").fetchone() is not None
+        triggers = []
+        if fts:
+            triggers += [
+                f'''CREATE TRIGGER IF NOT EXISTS transacties_fts_insert AFTER INSERT ON transacties BEGIN
+                    INSERT INTO transacties_fts (rowid, tekst) VALUES (new.id, {FTS_TEKST.format('new')});
+                END''',
+                f'''CREATE TRIGGER IF NOT EXISTS transacties_fts_delete AFTER DELETE ON transacties BEGIN
+                    INSERT INTO transacties_fts (transacties_fts, rowid, tekst) VALUES ('delete', old.id, {FTS_TEKST.format('old')});
+                END''',
+                f'''CREATE TRIGGER IF NOT EXISTS transacties_fts_update AFTER UPDATE OF naam, omschrijving ON transacties BEGIN
+                    INSERT INTO transacties_fts (transacties_fts, rowid, tekst) VALUES ('delete', old.id, {FTS_TEKST.format('old')});
+                    INSERT INTO transacties_fts (rowid, tekst) VALUES (new.id, {FTS_TEKST.format('new')});
+                END''',
+            ]
+        # Bij een update (ook van de categorie) eerst de oude rij eraf, dan de nieuwe erbij
+        triggers += [
+            f'''CREATE TRIGGER IF NOT EXISTS transacties_maandtotalen_insert AFTER INSERT ON transacties BEGIN
+                {_maandtotalen_delta('new', '')}
+            END''',
+            f'''CREATE TRIGGER IF NOT EXISTS transacties_maandtotalen_delete AFTER DELETE ON transacties BEGIN
+                {_maandtotalen_delta('old', '-')}
+                {_maandtotalen_opruimen('old')}
+            END''',
+            f'''CREATE TRIGGER IF NOT EXISTS transacties_maandtotalen_update
+            AFTER UPDATE OF gebruiker_id, datum, rekening_id, categorie_id, bedrag ON transacties BEGIN
+                {_maandtotalen_delta('old', '-')}
+                {_maandtotalen_delta('new', '')}
+                {_maandtotalen_opruimen('old')}
+            END''',
+        ]
+        # Losse statements (geen executescript), zodat alles in de lopende transactie blijft
+        for trigger in triggers:
+            cursor.execute(trigger)
+        return fts
+
+    def _vul_maandtotalen(self, cursor, gebruiker_id=None):
+        """Bereken maandtotalen opnieuw uit de transacties (van één gebruiker of iedereen)"""
+        filter_ = 'WHERE gebruiker_id = ?' if gebruiker_id is not None else 'WHERE gebruiker_id IS NOT NULL'
+        params = (gebruiker_id,) if gebruiker_id is not None else ()
+        cursor.execute(f'DELETE FROM maandtotalen {filter_}', params)
+        cursor.execute(f'''
+            INSERT INTO maandtotalen ({MAANDTOTALEN_KOLOMMEN})
+            SELECT {MAANDTOTALEN_SLEUTEL.format('t')},
+                   SUM(max(coalesce(bedrag, 0), 0)), SUM(max(-coalesce(bedrag, 0), 0)),
+                   SUM(bedrag > 0), SUM(bedrag < 0), COUNT(*)
+            FROM transacties t {filter_}
+            GROUP BY 1, 2, 3, 4
+        ''', params)
+
+    def _zoek_voorwaarde(self, zoekterm):
+        """SQL voorwaarde op transacties (alias t) voor zoekterm in naam of omschrijving.
+
+        Via de zoekindex als dat kan; termen korter dan een trigram vallen terug
+        op een scan. Beide vinden delen van woorden, zonder onderscheid in hoofdletters.
+        """
+        if self.fts and len(zoekterm) >= FTS_MIN_LENGTE:
+            return (
+                "t.id IN (SELECT rowid FROM transacties_fts WHERE transacties_fts MATCH ?)",
+                '"' + zoekterm.replace('"', '""') + '"'
+            )
+        return "instr(categorie_tekst(t.naam, t.omschrijving), ?) > 0", zoekterm.lower()
+
+    def search_transactions(self, zoekterm, gebruiker_id, limit=None,
+                            kolommen='t.id, t.datum, t.rekening, t.naam, t.omschrijving, t.bedrag, t.categorie'):
+        """Zoek transacties van een gebruiker op (een deel van) naam of omschrijving"""
+        voorwaarde, param = self._zoek_voorwaarde(zoekterm)
+        return self.query_df(
+            f'''
+            SELECT {kolommen} FROM transacties_overzicht t
+            WHERE t.gebruiker_id = ? AND {voorwaarde}
+            ORDER BY t.datum DESC, t.id DESC
+            {'LIMIT ?' if limit else ''}
+            ''',
+            (gebruiker_id, param, limit) if limit else (gebruiker_id, param)
+        )
+
+    def count_matches(self, zoekterm, gebruiker_id):
+        """Tel de transacties van een gebruiker met zoekterm in naam of omschrijving"""
+        voorwaarde, param = self._zoek_voorwaarde(zoekterm)
+        rows = self.execute(
+            f"SELECT COUNT(*) FROM transacties t WHERE t.gebruiker_id = ? AND {voorwaarde}",
+            (gebruiker_id, param),
+            fetch=True
+        )
+        return rows[0][0]
+
+    def show_search_results(self, zoekterm, gebruiker_id=None, aantal=50):
+        """Toon transacties die zoekterm bevatten"""
+        totaal = self.count_matches(zoekterm, gebruiker_id)
+        if not totaal:
+            print(f"Geen transacties gevonden met '{zoekterm}'")
+            return
+
+        df = self.search_transactions(zoekterm, gebruiker_id, limit=aantal)
+        print(f"\n=== {totaal} TRANSACTIES MET '{zoekterm}' (nieuwste {len(df)}) ===")
+        for _, row in df.iterrows():
+            print(f"{row['datum']} | €{euro(row['bedrag']):>8.2f} | "
+                f"{(row['naam'] or '')[:20]:20} | "
+                f"{(row['categorie'] or '')[:15]:15} | "
+                f"{(row['omschrijving'] or '')[:50]}")
 
     def reload_config(self):
         """Herlaad configuratie en update database"""
-        with sqlite3.connect(self.db_path, timeout=10) as conn:
+        with self.transaction() as conn:
             cursor = conn.cursor()
             
             # Laad en update categorieën
@@ -142,139 +942,317 @@ class DatabaseManager:
                 gebruiker_id = gebruiker[0]
                 for cat in standaard_categorieen:
                     cursor.execute('INSERT OR IGNORE INTO categorieen (naam, type, beschrijving, gebruiker_id) VALUES (?, ?, ?, ?)',(*cat, gebruiker_id))
+                cursor.execute('INSERT OR IGNORE INTO categorieen (naam, gebruiker_id) VALUES (?, ?)', (ONGECATEGORISEERD, gebruiker_id))
             
             # Laad en update regels
-            standaard_regels = self._load_rules_config()
-            for regel in standaard_regels:
-                cursor.execute('INSERT OR IGNORE INTO categorisatie_regels (zoekterm, categorie) VALUES (?, ?)', regel)
-            
-            conn.commit()
-            print("Configuration reloaded successfully")
+            self._insert_default_rules(cursor)
+        print("Configuration reloaded successfully")
+
+    def get_rule_versions(self, gebruiker_id):
+        """Geef (versie standaardregels, versie eigen regels) voor een gebruiker"""
+        versies = dict(self.execute(
+            'SELECT gebruiker_id, versie FROM regelversies WHERE gebruiker_id IN (0, ?)',
+            (gebruiker_id,),
+            fetch=True
+        ))
+        return versies.get(0, 0), versies.get(gebruiker_id, 0)
 
     def get_categories(self, gebruiker_id=None):
-        """Haal alle categorieën op"""
-        with sqlite3.connect(self.db_path, timeout=10) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT naam, type, beschrijving FROM categorieen WHERE gebruiker_id = ? ORDER BY type, naam',(gebruiker_id,))
-            categorieën = cursor.fetchall()
-            return categorieën
+        """Haal alle te kiezen categorieën op (zonder 'Ongecategoriseerd')"""
+        return self.execute(
+            'SELECT naam, type, beschrijving FROM categorieen WHERE gebruiker_id = ? AND naam != ? ORDER BY type, naam',
+            (gebruiker_id, ONGECATEGORISEERD),
+            fetch=True
+        )
+
+    def get_account_types(self, gebruiker_id):
+        """Haal de opgeslagen koppeling IBAN -> rekeningtype op"""
+        rows = self.execute(
+            'SELECT iban, rekeningtype FROM rekeningen WHERE gebruiker_id = ? AND rekeningtype IS NOT NULL',
+            (gebruiker_id,),
+            fetch=True
+        )
+        return dict(rows)
+
+    def _dimensie_ids(self, tabel, kolom, gebruiker_id, waarden, types=None):
+        """Geef waarde -> id uit een dimensietabel (rekeningen/categorieen).
+
+        Ontbrekende waarden worden toegevoegd; met types (waarde -> type) krijgt
+        een nieuwe rij ook een type (kolom type, voor categorieen).
+        """
+        waarden = sorted({waarde for waarde in waarden if waarde is not None and waarde == waarde})
+        with self.transaction() as conn:
+            if types is None:
+                conn.executemany(
+                    f'INSERT OR IGNORE INTO {tabel} ({kolom}, gebruiker_id) VALUES (?, ?)',
+                    [(waarde, gebruiker_id) for waarde in waarden]
+                )
+            else:
+                conn.executemany(
+                    f'INSERT OR IGNORE INTO {tabel} ({kolom}, type, gebruiker_id) VALUES (?, ?, ?)',
+                    [(waarde, types[waarde], gebruiker_id) for waarde in waarden]
+                )
+            return dict(conn.execute(
+                f'SELECT {kolom}, id FROM {tabel} WHERE gebruiker_id = ? AND {kolom} IN (SELECT value FROM json_each(?))',
+                (gebruiker_id, json.dumps(waarden))
+            ).fetchall())
+
+    def get_account_ids(self, gebruiker_id, ibans):
+        """Geef IBAN -> rekening_id; onbekende rekeningen worden (zonder rekeningtype) toegevoegd"""
+        return self._dimensie_ids('rekeningen', 'iban', gebruiker_id, ibans)
+
+    def get_category_ids(self, gebruiker_id, namen):
+        """Geef categorienaam -> categorie_id voor bestaande categorieën; een onbekende naam geeft een ValueError"""
+        namen = sorted({naam for naam in namen if naam is not None and naam == naam})
+        ids = dict(self.execute(
+            'SELECT naam, id FROM categorieen WHERE gebruiker_id = ? AND naam IN (SELECT value FROM json_each(?))',
+            (gebruiker_id, json.dumps(namen)),
+            fetch=True
+        ))
+        onbekend = [naam for naam in namen if naam not in ids]
+        if onbekend:
+            raise ValueError(f"Onbekende categorie: {', '.join(onbekend)}")
+        return ids
+
+    def get_or_add_category_ids(self, gebruiker_id, namen, bedragen):
+        """Geef categorienaam -> categorie_id bij een import; nieuwe categorieën uit regels worden toegevoegd.
+
+        namen en bedragen horen per transactie bij elkaar. Een nieuwe categorie
+        krijgt het type dat bij het totaal van zijn bedragen past;
+        'Ongecategoriseerd' blijft zonder type.
+        """
+        totalen = {}
+        for naam, bedrag in zip(namen, bedragen):
+            if naam is None or naam != naam:
+                continue
+            totalen[naam] = totalen.get(naam, 0) + (int(bedrag) if bedrag is not None and bedrag == bedrag else 0)
+        types = {naam: categorie_type(totaal) for naam, totaal in totalen.items()}
+        if ONGECATEGORISEERD in types:
+            types[ONGECATEGORISEERD] = None
+        return self._dimensie_ids('categorieen', 'naam', gebruiker_id, totalen, types)
+
+    def rename_category(self, gebruiker_id, oude_naam, nieuwe_naam):
+        """Hernoem een categorie van een gebruiker; de transacties verwijzen op id en blijven ongewijzigd.
+
+        Eigen regels van de gebruiker gaan mee; standaardregels met de oude naam
+        krijgen een eigen regel met de nieuwe naam. Retourneert False als de
+        categorie niet bestaat of de nieuwe naam al in gebruik is.
+        """
+        with self.transaction() as conn:
+            bestaand = dict(conn.execute(
+                'SELECT naam, id FROM categorieen WHERE gebruiker_id = ? AND naam IN (?, ?)',
+                (gebruiker_id, oude_naam, nieuwe_naam)
+            ).fetchall())
+            if oude_naam not in bestaand or nieuwe_naam in bestaand:
+                return False
+            conn.execute('UPDATE categorieen SET naam = ? WHERE id = ?', (nieuwe_naam, bestaand[oude_naam]))
+            for tabel, sleutel in (('categorisatie_regels', 'zoekterm'), ('iban_regels', 'iban')):
+                conn.execute(
+                    f'UPDATE {tabel} SET categorie = ? WHERE categorie = ? AND gebruiker_id = ?',
+                    (nieuwe_naam, oude_naam, gebruiker_id)
+                )
+                conn.execute(
+                    f'''
+                    INSERT INTO {tabel} ({sleutel}, categorie, gebruiker_id)
+                    SELECT s.{sleutel}, ?, ? FROM {tabel} s
+                    WHERE s.gebruiker_id IS NULL AND s.actief = 1 AND s.categorie = ?
+                      AND NOT EXISTS (SELECT 1 FROM {tabel} e WHERE e.{sleutel} = s.{sleutel} AND e.gebruiker_id = ?)
+                    ''',
+                    (nieuwe_naam, gebruiker_id, oude_naam, gebruiker_id)
+                )
+        return True
+
+    def get_watch_cursor(self):
+        """Haal per bewaakt bestand de laatst verwerkte (grootte, wijzigingstijd) op"""
+        rows = self.execute('SELECT pad, grootte, gewijzigd FROM bewaakte_bestanden', fetch=True)
+        return {pad: (grootte, gewijzigd) for pad, grootte, gewijzigd in rows}
+
+    def register_watched_files(self, bestanden):
+        """Leg verwerkte bestanden vast als (pad, gebruiker_id, grootte, gewijzigd, status)"""
+        with self.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO bewaakte_bestanden (pad, gebruiker_id, grootte, gewijzigd, status)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(pad) DO UPDATE SET
+                    gebruiker_id = excluded.gebruiker_id, grootte = excluded.grootte,
+                    gewijzigd = excluded.gewijzigd, status = excluded.status,
+                    verwerkt_op = CURRENT_TIMESTAMP
+            ''', bestanden)
 
     def show_recent_transactions(self, aantal=20, gebruiker_id=None):
         """Toon recente transacties"""
-        with sqlite3.connect(self.db_path, timeout=10) as conn:
-            cursor = conn.cursor()
+        conn = self._connect()
+        cursor = conn.cursor()
 
-            # Gebruikersnaam ophalen
-            cursor.execute("SELECT naam FROM gebruikers WHERE id = ?", (gebruiker_id,))
-            row = cursor.fetchone()
-            gebruikersnaam = row[0] if row else "Onbekend"
+        # Gebruikersnaam ophalen
+        cursor.execute("SELECT naam FROM gebruikers WHERE id = ?", (gebruiker_id,))
+        row = cursor.fetchone()
+        gebruikersnaam = row[0] if row else "Onbekend"
         
-            query = """
-                SELECT datum, rekening, naam, omschrijving, bedrag, categorie, rekeningtype
-                FROM transacties WHERE gebruiker_id = ?
-                ORDER BY datum DESC, imported_at DESC
-                LIMIT ?
-            """
+        query = """
+            SELECT datum, rekening, naam, omschrijving, bedrag, categorie, rekeningtype
+            FROM transacties_overzicht WHERE gebruiker_id = ?
+            ORDER BY datum DESC, imported_at DESC
+            LIMIT ?
+        """
         
-            df = pd.read_sql_query(query, conn, params=[gebruiker_id,aantal])
+        df = pd.read_sql_query(query, conn, params=[gebruiker_id,aantal])
         
-            if df.empty:
-                print("Geen transacties gevonden")
-                return
+        if df.empty:
+            print("Geen transacties gevonden")
+            return
         
-            print(f"\n=== LAATSTE {aantal} TRANSACTIES voor gebruiker: {gebruikersnaam} ===")
-            for _, row in df.iterrows():
-                print(f"{row['datum']} | €{row['bedrag']:>8.2f} | "
-                    f"{(row['naam'] or '')[:20]:20} | "
-                    f"{(row['categorie'] or '')[:15]:15} | "
-                    f"{(row['omschrijving'] or '')[:50]}")
+        print(f"\n=== LAATSTE {aantal} TRANSACTIES voor gebruiker: {gebruikersnaam} ===")
+        for _, row in df.iterrows():
+            print(f"{row['datum']} | €{euro(row['bedrag']):>8.2f} | "
+                f"{(row['naam'] or '')[:20]:20} | "
+                f"{(row['categorie'] or '')[:15]:15} | "
+                f"{(row['omschrijving'] or '')[:50]}")
+
+    def show_import_history(self, aantal=20, gebruiker_id=None):
+        """Toon de laatst geïmporteerde bestanden uit het import ledger"""
+        df = self.query_df("""
+            SELECT imported_at, bestandsnaam, bank, rekening, aantal_rijen, aantal_nieuw, datum_van, datum_tot, bestand_hash
+            FROM geimporteerde_bestanden WHERE gebruiker_id = ?
+            ORDER BY imported_at DESC, id DESC
+            LIMIT ?
+        """, (gebruiker_id, aantal))
+
+        if df.empty:
+            print("Nog geen bestanden geïmporteerd")
+            return
+
+        print(f"\n=== LAATSTE {aantal} GEÏMPORTEERDE BESTANDEN ===")
+        for _, row in df.iterrows():
+            print(f"{row['imported_at']} | {(row['bank'] or ''):5} | "
+                f"{(row['rekening'] or '')[:20]:20} | "
+                f"{row['aantal_rijen']:>5} rijen, {row['aantal_nieuw']:>5} nieuw | "
+                f"{row['datum_van']} - {row['datum_tot']} | "
+                f"{row['bestandsnaam']} ({row['bestand_hash'][:12]})")
+
+    def rebuild_month_totals(self, gebruiker_id=None):
+        """Bereken de maandtotalen opnieuw uit de transacties, voor één gebruiker of iedereen"""
+        with self.transaction() as conn:
+            self._vul_maandtotalen(conn.cursor(), gebruiker_id)
+
+    def get_month_totals(self, gebruiker_id, jaar):
+        """Haal de maandtotalen van een jaar op als DataFrame.
+
+        Kolommen: maand ('YYYY-MM'), rekening ('' als leeg) en categorie (leeg als
+        er geen is) als pandas categoricals, inkomsten en uitgaven (centen, beide
+        positief), aantal_in, aantal_uit en aantal.
+        """
+        begin, eind = jaar_bereik(jaar)
+        df = self.query_df(
+            """
+            SELECT m.maand, coalesce(r.iban, '') AS rekening, c.naam AS categorie,
+                   m.inkomsten, m.uitgaven, m.aantal_in, m.aantal_uit, m.aantal
+            FROM maandtotalen m
+            LEFT JOIN rekeningen r ON r.id = m.rekening_id
+            LEFT JOIN categorieen c ON c.id = m.categorie_id
+            WHERE m.gebruiker_id = ? AND m.maand >= ? AND m.maand < ?
+            ORDER BY m.maand, rekening, categorie
+            """,
+            (gebruiker_id, begin[:7], eind[:7])
+        )
+        return df.astype({'rekening': 'category', 'categorie': 'category'})
 
     def get_database_stats(self, gebruiker_id=None):
-        """Toon database statistieken"""
-        with sqlite3.connect(self.db_path, timeout=10) as conn:
-            cursor = conn.cursor()
+        """Toon database statistieken (uit de maandtotalen, behalve het exacte datumbereik)"""
+        conn = self._connect()
+        cursor = conn.cursor()
 
-            # Gebruikersnaam ophalen
-            cursor.execute("SELECT naam FROM gebruikers WHERE id = ?", (gebruiker_id,))
-            row = cursor.fetchone()
-            gebruikersnaam = row[0] if row else "Onbekend"
+        # Gebruikersnaam ophalen
+        cursor.execute("SELECT naam FROM gebruikers WHERE id = ?", (gebruiker_id,))
+        row = cursor.fetchone()
+        gebruikersnaam = row[0] if row else "Onbekend"
 
-            # Totaal aantal transacties
-            cursor.execute("SELECT COUNT(*) FROM transacties WHERE gebruiker_id = ?", (gebruiker_id,))
-            total_transacties = cursor.fetchone()[0]
+        # Totaal aantal transacties
+        cursor.execute("SELECT coalesce(SUM(aantal), 0) FROM maandtotalen WHERE gebruiker_id = ?", (gebruiker_id,))
+        total_transacties = cursor.fetchone()[0]
  
-            # Transacties per rekeningtype
-            cursor.execute("""
-                SELECT rekeningtype, COUNT(*)
-                FROM transacties
-                GROUP BY rekeningtype
-            """)
-            per_type = cursor.fetchall()
+        # Transacties per rekeningtype, via de koppeling IBAN -> rekeningtype;
+        # elke import slaat het type op, een rekening zonder type telt als onbekend
+        cursor.execute("""
+            SELECT coalesce(r.rekeningtype, 'onbekend') AS rekeningtype, SUM(m.aantal)
+            FROM maandtotalen m
+            LEFT JOIN rekeningen r ON r.id = m.rekening_id
+            WHERE m.gebruiker_id = ?
+            GROUP BY 1
+        """, (gebruiker_id,))
+        per_type = cursor.fetchall()
  
-            # Datumbereik
-            cursor.execute("SELECT MIN(datum), MAX(datum) FROM transacties WHERE gebruiker_id = ?", (gebruiker_id,))
-            datum_bereik = cursor.fetchone()
+        # Datumbereik
+        # Twee losse subqueries, zodat MIN en MAX elk één stap in de index zijn
+        cursor.execute("""
+            SELECT (SELECT MIN(datum) FROM transacties WHERE gebruiker_id = ?),
+                   (SELECT MAX(datum) FROM transacties WHERE gebruiker_id = ?)
+        """, (gebruiker_id, gebruiker_id))
+        datum_bereik = cursor.fetchone()
  
-            # Transacties per rekening
-            cursor.execute("""
-                SELECT rekening, COUNT(*), MIN(datum), MAX(datum)
-                FROM transacties WHERE gebruiker_id = ?
-                GROUP BY rekening
-                ORDER BY COUNT(*) DESC
-            """, (gebruiker_id,))
-            per_rekening = cursor.fetchall()
+        # Transacties per rekening, met eerste en laatste maand
+        cursor.execute("""
+            SELECT r.iban, SUM(m.aantal), MIN(m.maand), MAX(m.maand)
+            FROM maandtotalen m
+            LEFT JOIN rekeningen r ON r.id = m.rekening_id
+            WHERE m.gebruiker_id = ?
+            GROUP BY m.rekening_id
+            ORDER BY SUM(m.aantal) DESC
+        """, (gebruiker_id,))
+        per_rekening = cursor.fetchall()
  
-            # Categorieën statistieken
-            cursor.execute("""
-                SELECT categorie, COUNT(*), SUM(bedrag)
-                FROM transacties WHERE gebruiker_id = ?
-                GROUP BY categorie
-                ORDER BY COUNT(*) DESC
-            """, (gebruiker_id,))
-            per_categorie = cursor.fetchall()
+        # Categorieën statistieken
+        cursor.execute("""
+            SELECT c.naam, SUM(m.aantal), SUM(m.inkomsten) - SUM(m.uitgaven)
+            FROM maandtotalen m
+            LEFT JOIN categorieen c ON c.id = m.categorie_id
+            WHERE m.gebruiker_id = ?
+            GROUP BY m.categorie_id
+            ORDER BY SUM(m.aantal) DESC
+        """, (gebruiker_id,))
+        per_categorie = cursor.fetchall()
  
  
-            print(f"\n=== Database Status voor gebruiker: {gebruikersnaam} ===")
-            print(f"Totaal transacties: {total_transacties}")
+        print(f"\n=== Database Status voor gebruiker: {gebruikersnaam} ===")
+        print(f"Totaal transacties: {total_transacties}")
  
-            if datum_bereik[0] and datum_bereik[1]:
-                print(f"Periode: {datum_bereik[0]} tot {datum_bereik[1]}")
+        if datum_bereik[0] and datum_bereik[1]:
+            print(f"Periode: {datum_bereik[0]} tot {datum_bereik[1]}")
  
-            print(f"\nTransacties per rekeningtype:")
-            for rtype, count in per_type:
-                print(f"  {rtype}: {count}")
+        print(f"\nTransacties per rekeningtype:")
+        for rtype, count in per_type:
+            print(f"  {rtype}: {count}")
  
-            print(f"\nTransacties per rekening:")
-            for rekening, count, min_datum, max_datum in per_rekening:
-                print(f"  {rekening}: {count} transacties ({min_datum} - {max_datum})")
+        print(f"\nTransacties per rekening:")
+        for rekening, count, eerste_maand, laatste_maand in per_rekening:
+            print(f"  {rekening}: {count} transacties ({eerste_maand} - {laatste_maand})")
  
-            print(f"\nTop 10 categorieën:")
-            for categorie, count, totaal in per_categorie[:10]:
-                print(f"  {categorie}: {count} transacties, €{totaal:.2f}")
+        print(f"\nTop 10 categorieën:")
+        for categorie, count, totaal in per_categorie[:10]:
+            print(f"  {categorie}: {count} transacties, €{euro(totaal):.2f}")
  
     def execute(self, query, params=None, fetch=False, many=False):
-        with self._connect() as conn:
-            cur = conn.cursor()
+        """Voer een query uit; writes buiten transaction() worden direct gecommit"""
+        if fetch:
+            cur = self._connect().cursor()
+            cur.execute(query, params or ())
+            return cur.fetchall()
+        with self.transaction() as conn:
             if many:
-                cur.executemany(query, params)
+                conn.executemany(query, params)
             else:
-                cur.execute(query, params or ())
-            if fetch:
-                return cur.fetchall()
-            conn.commit()
+                conn.execute(query, params or ())
 
     def execute_df(self, query, params=None):
-        with self._connect() as conn:
-            return pd.read_sql_query(query, conn, params=params)
+        return pd.read_sql_query(query, self._connect(), params=params)
 
     def query_df(self, query, params=None):
         """Voer een query uit en retourneer een pandas DataFrame"""
-        with self._connect() as conn:
-            return pd.read_sql_query(query, conn, params=params or ())
+        return pd.read_sql_query(query, self._connect(), params=params or ())
 
     def create_user(self, naam):
         """Voeg een nieuwe gebruiker toe (of gebruik bestaande) en vul standaardcategorieën"""
-        with self._connect() as conn:
+        with self.transaction() as conn:
             cursor = conn.cursor()
     
             # Probeer gebruiker toe te voegen
@@ -295,31 +1273,21 @@ class DatabaseManager:
                     'INSERT OR IGNORE INTO categorieen (naam, type, beschrijving, gebruiker_id) VALUES (?, ?, ?, ?)',
                     (*cat, gebruiker_id)
                 )
+            cursor.execute('INSERT OR IGNORE INTO categorieen (naam, gebruiker_id) VALUES (?, ?)', (ONGECATEGORISEERD, gebruiker_id))
     
-            conn.commit()
             print(f"Gebruiker '{naam}' actief met ID {gebruiker_id}, categorieën ingesteld.")
     
 
     def get_all_users(self):
         """Haal alle gebruikers op"""
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT id, naam FROM gebruikers ORDER BY naam')
-            gebruikers = cursor.fetchall()
-            return gebruikers
+        return self.execute('SELECT id, naam FROM gebruikers ORDER BY naam', fetch=True)
 
     def delete_user(self, naam):
         """Verwijder een gebruiker op naam"""
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM gebruikers WHERE naam = ?', (naam,))
-            conn.commit()
+        self.execute('DELETE FROM gebruikers WHERE naam = ?', (naam,))
 
     def get_user_id(self, naam):
         """Haal het ID op van een gebruiker"""
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT id FROM gebruikers WHERE naam = ?', (naam,))
-            gebruiker_id = cursor.fetchone()
-            return gebruiker_id[0] if gebruiker_id else None
+        gebruiker_id = self.execute('SELECT id FROM gebruikers WHERE naam = ?', (naam,), fetch=True)
+        return gebruiker_id[0][0] if gebruiker_id else None
 
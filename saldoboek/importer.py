@@ -1,8 +1,30 @@
 import pandas as pd
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from .config.bank_parsers import BANK_PARSERS
-from .parsers.sns_parser import SNSParser
-from .parsers.rabo_parser import RaboParser
+from .database import transactie_fingerprint
+from .parsers import FORMATEN, get_parser, sniff_bestand
+
+def bestand_hash(filepath, blokgrootte=1 << 20):
+    """SHA-256 van de inhoud van een bestand, in blokken gelezen"""
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for blok in iter(lambda: f.read(blokgrootte), b''):
+            h.update(blok)
+    return h.hexdigest()
+
+def _parse_bestand(bank, filepath, rekeningtype, encoding):
+    """Parse één bestand in een worker proces (zonder interactieve vragen)"""
+    return get_parser(bank).parse_csv(filepath, rekeningtype, encoding)
+
+# Bestanden groter dan deze drempel worden in blokken ingelezen
+STREAM_DREMPEL = 50 * 1024 * 1024
+CHUNK_GROOTTE = 50000
+
+# Voorlopig rekeningtype bij headless import; wordt via de IBAN-koppeling ingevuld
+ONBEKEND = 'onbekend'
 
 class TransactionImporter:
     def __init__(self, categorizer, db_manager, gebruiker_id):
@@ -10,179 +32,416 @@ class TransactionImporter:
         self.db = db_manager
         self.gebruiker_id = gebruiker_id
         
-        # Initialiseer parsers
-        self.sns_parser = SNSParser()
-        self.rabo_parser = RaboParser()
+        # Initialiseer een parser per geregistreerd bankformaat
+        self.parsers = {bank: get_parser(bank) for bank in FORMATEN}
+
+    def detect_format(self, filepath):
+        """Bepaal (bank, encoding) uit de eerste paar KB van het bestand.
+
+        Als de kolomindeling niet herkend wordt, valt de bank terug op de
+        bestandsnaam.
+        """
+        bank, encoding = sniff_bestand(filepath)
+        if bank:
+            return bank, encoding
 
-    def detect_bank_and_parse(self, filepath):
         filename = os.path.basename(filepath).upper()
+        for bank_code, spec in BANK_PARSERS.items():
+            if any(tekst in filename for tekst in spec.get('bestandsnaam', [bank_code])):
+                return bank_code, encoding
+        return None, encoding
 
-        if 'SNS' in filename:
-            return self.sns_parser.parse_csv(filepath)
-        elif 'RABO' in filename or 'RABOBANK' in filename:
-            return self.rabo_parser.parse_csv(filepath)
-        else:
-            # Fallback naar oude methode
-            for bank_code, parser_method in BANK_PARSERS.items():
-                if bank_code in filename:
-                    return getattr(self, parser_method)(filepath)
+    def detect_bank(self, filepath):
+        """Bepaal de bank op basis van de inhoud of bestandsnaam"""
+        return self.detect_format(filepath)[0]
 
-        raise ValueError(f"Onbekend bankformaat in bestandsnaam: {filename}")        
+    def _detect_parser(self, filepath):
+        bank, encoding = self.detect_format(filepath)
+        if bank not in self.parsers:
+            filename = os.path.basename(filepath).upper()
+            raise ValueError(f"Onbekend bankformaat: {filename}")
+        return self.parsers[bank], encoding
 
-    def import_transactions_with_categorization(self, file_paths, gebruiker_id):
-        """Importeer transacties met interactieve categorisatie"""
-        ongecategoriseerd = []
-        total_imported = 0
-    
+    def detect_bank_and_parse(self, filepath, rekeningtype=None):
+        parser, encoding = self._detect_parser(filepath)
+        return parser.parse_csv(filepath, rekeningtype, encoding)
+
+    def detect_bank_and_stream(self, filepath, chunksize=CHUNK_GROOTTE, rekeningtype=None):
+        """Als detect_bank_and_parse, maar levert genormaliseerde blokken op"""
+        parser, encoding = self._detect_parser(filepath)
+        return parser.iter_csv(filepath, rekeningtype, chunksize, encoding)
+
+    def _find_previous_import(self, file_hash):
+        """Zoek een eerdere import van een bestand met dezelfde inhoud"""
+        rows = self.db.execute(
+            'SELECT imported_at, bestandsnaam FROM geimporteerde_bestanden WHERE bestand_hash = ? AND gebruiker_id = ?',
+            (file_hash, self.gebruiker_id),
+            fetch=True
+        )
+        return rows[0] if rows else None
+
+    def _register_import(self, cursor, file_path, file_hash, bank, rekeningen, aantal_rijen, nieuwe_transacties, datum_van, datum_tot):
+        """Leg een geïmporteerd bestand vast in het import ledger.
+
+        Bij een geforceerde herimport blijft de rij (met id en eerste importtijd)
+        staan; de nieuwe transacties worden opgeteld bij het eerdere aantal.
+        """
+        cursor.execute(
+            '''
+            INSERT INTO geimporteerde_bestanden
+            (gebruiker_id, bestand_hash, bestandsnaam, bank, rekening, aantal_rijen, aantal_nieuw, datum_van, datum_tot)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(bestand_hash, gebruiker_id) DO UPDATE SET
+                bestandsnaam = excluded.bestandsnaam, bank = excluded.bank, rekening = excluded.rekening,
+                aantal_rijen = excluded.aantal_rijen, aantal_nieuw = aantal_nieuw + excluded.aantal_nieuw,
+                datum_van = excluded.datum_van, datum_tot = excluded.datum_tot
+            ''',
+            (
+                self.gebruiker_id,
+                file_hash,
+                os.path.basename(file_path),
+                bank,
+                ', '.join(rekeningen),
+                aantal_rijen,
+                nieuwe_transacties,
+                datum_van.strftime('%Y-%m-%d'),
+                datum_tot.strftime('%Y-%m-%d')
+            )
+        )
+
+    def _skip(self, resultaten, file_path, status, melding):
+        print(melding)
+        resultaten.append({'bestand': file_path, 'status': status})
+
+    def _parse_files(self, file_paths, forceer, resultaten, chunksize=None, rekeningtype=None):
+        """Parse bestanden één voor één; levert (pad, hash, bank, blokken) op.
+
+        Grote bestanden (of alle bestanden als chunksize is opgegeven) worden
+        lui in blokken gelezen in plaats van in één DataFrame.
+        """
         for file_path in file_paths:
             if not os.path.exists(file_path):
-                print(f"Bestand niet gevonden: {file_path}")
+                self._skip(resultaten, file_path, 'niet_gevonden', f"Bestand niet gevonden: {file_path}")
                 continue
-    
+
             print(f"\nVerwerken: {file_path}")
-    
+
+            file_hash = bestand_hash(file_path)
+            eerder = self._find_previous_import(file_hash)
+            if eerder and not forceer:
+                self._skip(resultaten, file_path, 'al_geimporteerd',
+                           f"  ! Al geïmporteerd op {eerder[0]} als '{eerder[1]}', overgeslagen")
+                continue
+
+            bank, encoding = self.detect_format(file_path)
+            if bank not in self.parsers:
+                self._skip(resultaten, file_path, 'onbekend_formaat',
+                           f"  ! Onbekend bankformaat: {os.path.basename(file_path).upper()}")
+                continue
+
+            parser = self.parsers[bank]
+            if chunksize or os.path.getsize(file_path) > STREAM_DREMPEL:
+                blokken = parser.iter_csv(file_path, rekeningtype, chunksize or CHUNK_GROOTTE, encoding)
+            else:
+                try:
+                    blokken = [parser.parse_csv(file_path, rekeningtype, encoding)]
+                except Exception as e:
+                    self._skip(resultaten, file_path, 'fout', f"Fout bij lezen van {file_path}: {e}")
+                    continue
+
+            yield file_path, file_hash, bank, blokken
+
+    def _parse_files_parallel(self, file_paths, forceer, resultaten, max_workers=None, rekeningtype=None):
+        """Parse bestanden gelijktijdig in een process pool.
+
+        Rekeningtypes worden vooraf gevraagd (tenzij opgegeven), zodat de
+        workers niet interactief zijn. De resultaten komen in de oorspronkelijke
+        volgorde terug zodra ze klaar zijn, zodat de schrijver niet op alle
+        bestanden hoeft te wachten.
+        """
+        taken = []
+        for file_path in file_paths:
+            if not os.path.exists(file_path):
+                self._skip(resultaten, file_path, 'niet_gevonden', f"Bestand niet gevonden: {file_path}")
+                continue
+
+            file_hash = bestand_hash(file_path)
+            eerder = self._find_previous_import(file_hash)
+            if eerder and not forceer:
+                self._skip(resultaten, file_path, 'al_geimporteerd',
+                           f"  ! {file_path} al geïmporteerd op {eerder[0]} als '{eerder[1]}', overgeslagen")
+                continue
+
+            bank, encoding = self.detect_format(file_path)
+            if bank not in self.parsers:
+                self._skip(resultaten, file_path, 'onbekend_formaat',
+                           f"  ! Onbekend bankformaat: {os.path.basename(file_path).upper()}")
+                continue
+
+            type_bestand = rekeningtype or self.parsers[bank]._ask_account_type(file_path)
+            taken.append((bank, file_path, type_bestand, encoding, file_hash))
+
+        if not taken:
+            return
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            uitkomsten = [executor.submit(_parse_bestand, *taak[:4]) for taak in taken]
+            for (bank, file_path, _, _, file_hash), uitkomst in zip(taken, uitkomsten):
+                print(f"\nVerwerken: {file_path}")
+                try:
+                    df = uitkomst.result()
+                except Exception as e:
+                    self._skip(resultaten, file_path, 'fout', f"Fout bij lezen van {file_path}: {e}")
+                    continue
+                yield file_path, file_hash, bank, [df]
+
+    def _resolve_account_types(self, file_path, blokken, rekeningtypes, geraden):
+        """Vul rekeningtypes in uit de opgeslagen IBAN-koppeling (headless import).
+
+        Onbekende rekeningen krijgen het type uit de bestandsnaam ('spaar'),
+        anders betaalrekening; die rekeningen worden in geraden verzameld.
+        """
+        standaard = 'spaarrekening' if 'SPAAR' in os.path.basename(file_path).upper() else 'betaalrekening'
+        for df in blokken:
+            if not df.empty:
+                bekend = df['rekening'].map(rekeningtypes)
+                geraden.update(str(r) for r in df.loc[bekend.isna(), 'rekening'].dropna().unique())
+                df['rekeningtype'] = bekend.fillna(standaard)
+            yield df
+
+    def _run_import(self, file_paths, forceer, parallel, max_workers, chunksize, headless):
+        """Voer de import uit; retourneert (resultaten per bestand, fingerprints van ongecategoriseerde transacties)"""
+        resultaten = []
+        ongecategoriseerd = []
+        rekeningtype = ONBEKEND if headless else None
+        rekeningtypes = self.db.get_account_types(self.gebruiker_id) if headless else None
+
+        if parallel:
+            geparsed = self._parse_files_parallel(file_paths, forceer, resultaten, max_workers, rekeningtype)
+        else:
+            geparsed = self._parse_files(file_paths, forceer, resultaten, chunksize, rekeningtype)
+
+        for file_path, file_hash, bank, blokken in geparsed:
+            # Hetzelfde bestand kan meerdere keren in één batch zitten
+            eerder = self._find_previous_import(file_hash)
+            if eerder and not forceer:
+                self._skip(resultaten, file_path, 'al_geimporteerd',
+                           f"  ! Al geïmporteerd op {eerder[0]} als '{eerder[1]}', overgeslagen")
+                continue
+
+            geraden = set()
+            if headless:
+                blokken = self._resolve_account_types(file_path, blokken, rekeningtypes, geraden)
+
+            bestand_ongecategoriseerd = []
             try:
-                df = self.detect_bank_and_parse(file_path)
-            except ValueError as e:
-                print(f"  ! {e}")
+                resultaat = self._import_file(file_path, file_hash, bank, blokken, bestand_ongecategoriseerd,
+                                              geraden=geraden if headless else None)
+            except Exception as e:
+                self._skip(resultaten, file_path, 'fout', f"Fout bij lezen van {file_path}: {e}")
                 continue
-    
-            if df.empty:
+            if resultaat is None:
+                resultaten.append({'bestand': file_path, 'status': 'leeg'})
                 continue
-    
-            nieuwe_transacties = 0
-            duplicaten = 0
-    
-            for _, row in df.iterrows():
-                datum_str = row['datum'].strftime('%Y-%m-%d')
-                bestaande = self.db.execute(
-                    '''
-                    SELECT COUNT(*) FROM transacties 
-                    WHERE datum = ? AND rekening = ? AND bedrag = ? AND omschrijving = ? AND gebruiker_id = ?
-                    ''',
-                    (datum_str, row['rekening'], row['bedrag'], row['omschrijving'], self.gebruiker_id),
-                    fetch=True
-                )
-    
-                if bestaande[0][0] == 0:
-                    categorie = self.categorizer.categorize(
-                        row.get('naam', ''),
-                        row['omschrijving']
-                    )
-    
-                    if not categorie:
-                        ongecategoriseerd.append({
-                            'naam': row.get('naam', ''),
-                            'omschrijving': row['omschrijving'],
-                            'rekening': row['rekening'],
-                            'tegenrekening': row['tegenrekening'],
-                            'bedrag': row['bedrag'],
-                            'datum': datum_str,
-                            'row_data': row
-                        })
-                        categorie = 'Ongecategoriseerd'
-    
-                    self.db.execute(
-                        '''
-                        INSERT INTO transacties 
-                        (datum, rekening, tegenrekening, naam, omschrijving, bedrag, saldo_voor, valuta, categorie, rekeningtype, gebruiker_id)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''',
-                        (
-                            datum_str,
-                            row['rekening'],
-                            row.get('tegenrekening', ''),
-                            row.get('naam', ''),
-                            row['omschrijving'],
-                            row['bedrag'],
-                            row.get('saldo_voor', 0),
-                            row.get('valuta', 'EUR'),
-                            categorie,
-                            row['rekeningtype'],
-                            self.gebruiker_id
-                        )
-                    )
-                    nieuwe_transacties += 1
-                else:
-                    duplicaten += 1
-    
+
+            nieuwe_transacties, duplicaten = resultaat
+            ongecategoriseerd.extend(bestand_ongecategoriseerd)
+            if geraden:
+                # Volgende bestanden in deze batch gebruiken het zojuist opgeslagen type
+                rekeningtypes.update(self.db.get_account_types(self.gebruiker_id))
+            resultaten.append({
+                'bestand': file_path,
+                'status': 'geimporteerd',
+                'bank': bank,
+                'nieuw': nieuwe_transacties,
+                'duplicaten': duplicaten,
+                'ongecategoriseerd': len(bestand_ongecategoriseerd),
+                'geraden_rekeningtypes': sorted(geraden),
+            })
+
             print(f"  ✓ {nieuwe_transacties} nieuwe transacties geïmporteerd")
             if duplicaten > 0:
                 print(f"  ! {duplicaten} duplicaten overgeslagen")
-            total_imported += nieuwe_transacties
-    
+
+        return resultaten, ongecategoriseerd
+
+    def import_transactions_with_categorization(self, file_paths, gebruiker_id, forceer=False, parallel=False, max_workers=None, chunksize=None):
+        """Importeer transacties met interactieve categorisatie.
+
+        Bestanden die met identieke inhoud al eerder zijn geïmporteerd worden
+        overgeslagen voordat ze geparsed worden, tenzij forceer=True. Met
+        parallel=True worden de bestanden in een process pool geparsed en
+        schrijft alleen dit proces naar de database, in dezelfde volgorde als
+        bij sequentiële import. Met chunksize worden bestanden in blokken van
+        zoveel rijen gelezen, gecategoriseerd en ingevoegd.
+        """
+        resultaten, ongecategoriseerd = self._run_import(file_paths, forceer, parallel, max_workers, chunksize, headless=False)
+        total_imported = sum(r.get('nieuw', 0) for r in resultaten)
+
         if ongecategoriseerd:
             self._handle_uncategorized_transactions(ongecategoriseerd)
-    
+
         print(f"\n=== Import voltooid ===")
         print(f"Totaal nieuwe transacties: {total_imported}")
         if ongecategoriseerd:
-            print(f"Ongecategoriseerd: {len([t for t in ongecategoriseerd if t.get('categorie') == 'Ongecategoriseerd'])}")
-    
+            print(f"Ongecategoriseerd: {len(self._ongecategoriseerde_transacties(ongecategoriseerd))}")
+
         return total_imported
-    
+
+    def import_batch(self, file_paths, forceer=False, parallel=False, max_workers=None, chunksize=None):
+        """Importeer zonder interactieve vragen, bijvoorbeeld vanuit een cron job.
+
+        Rekeningtypes komen uit de opgeslagen IBAN-koppeling, ongecategoriseerde
+        transacties blijven als 'Ongecategoriseerd' staan voor latere controle
+        (menu optie 6). Retourneert een JSON-serialiseerbare samenvatting.
+        """
+        resultaten, ongecategoriseerd = self._run_import(file_paths, forceer, parallel, max_workers, chunksize, headless=True)
+        return {
+            'gebruiker_id': self.gebruiker_id,
+            'bestanden': resultaten,
+            'totaal_nieuw': sum(r.get('nieuw', 0) for r in resultaten),
+            'totaal_duplicaten': sum(r.get('duplicaten', 0) for r in resultaten),
+            'totaal_ongecategoriseerd': len(ongecategoriseerd),
+        }
+
+    def _import_file(self, file_path, file_hash, bank, blokken, ongecategoriseerd, geraden=None):
+        """Importeer alle blokken van één bestand in één transactie.
+
+        Het bestand wordt in dezelfde transactie in het import ledger
+        vastgelegd, net als de rekeningtypes per IBAN. Bij een headless import
+        is geraden de verzameling IBANs waarvan het type geraden is; alleen die
+        worden opgeslagen, gemarkeerd als geraden, en alleen als de rekening nog
+        geen type had. Een interactief gekozen type is bevestigd en gaat altijd voor.
+        Retourneert (nieuwe_transacties, duplicaten), of None als het bestand
+        geen transacties bevat.
+        """
+        nieuwe_transacties = duplicaten = aantal_rijen = 0
+        rekeningen = {}
+        rekeningtypes = {}
+        datum_van = datum_tot = None
+
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS import_staging (
+                    rij INTEGER PRIMARY KEY,
+                    fingerprint TEXT
+                )
+            ''')
+
+            for df in blokken:
+                if df.empty:
+                    continue
+                nieuw, dubbel = self._bulk_import(cursor, df, ongecategoriseerd)
+                nieuwe_transacties += nieuw
+                duplicaten += dubbel
+                aantal_rijen += len(df)
+                rekeningen.update(dict.fromkeys(str(r) for r in df['rekening'].dropna().unique()))
+                paren = df[['rekening', 'rekeningtype']].dropna().drop_duplicates('rekening')
+                rekeningtypes.update(zip(paren['rekening'].astype(str), paren['rekeningtype']))
+                datum_van = df['datum'].min() if datum_van is None else min(datum_van, df['datum'].min())
+                datum_tot = df['datum'].max() if datum_tot is None else max(datum_tot, df['datum'].max())
+
+            if not aantal_rijen:
+                return None
+
+            self._register_import(cursor, file_path, file_hash, bank, rekeningen, aantal_rijen,
+                                  nieuwe_transacties, datum_van, datum_tot)
+            if geraden is not None:
+                rekeningtypes = {iban: rekeningtype for iban, rekeningtype in rekeningtypes.items() if iban in geraden}
+            cursor.executemany(
+                '''
+                INSERT INTO rekeningen (gebruiker_id, iban, rekeningtype, geraden) VALUES (?, ?, ?, ?)
+                ON CONFLICT(iban, gebruiker_id) DO UPDATE SET rekeningtype = excluded.rekeningtype, geraden = excluded.geraden
+                WHERE NOT excluded.geraden OR rekeningen.rekeningtype IS NULL
+                ''',
+                [(self.gebruiker_id, iban, rekeningtype, geraden is not None) for iban, rekeningtype in rekeningtypes.items()]
+            )
+
+        return nieuwe_transacties, duplicaten
+
+    def _bulk_import(self, cursor, df, ongecategoriseerd):
+        """Importeer een geparsed (blok van een) bestand set-gebaseerd.
+
+        Duplicaten worden via de fingerprint in één geïndexeerde anti-join
+        tegen een staging tabel bepaald, alleen de nieuwe rijen worden
+        gecategoriseerd en daarna met één executemany ingevoegd.
+        Retourneert (nieuwe_transacties, duplicaten).
+        """
+        records = pd.DataFrame({
+            'datum': df['datum'].dt.strftime('%Y-%m-%d'),
+            'rekening': df['rekening'],
+            'tegenrekening': df.get('tegenrekening', ''),
+            'naam': df.get('naam', ''),
+            'omschrijving': df['omschrijving'],
+            'bedrag': df['bedrag'],
+            'saldo_voor': df.get('saldo_voor', 0),
+            'valuta': df.get('valuta', 'EUR'),
+            'rekeningtype': df['rekeningtype'],
+        }).reset_index(drop=True)
+        records['fingerprint'] = [
+            transactie_fingerprint(self.gebruiker_id, *sleutel)
+            for sleutel in zip(records['datum'], records['rekening'], records['bedrag'], records['omschrijving'])
+        ]
+
+        # Dubbele rijen binnen hetzelfde bestand tellen als duplicaat, net als voorheen;
+        # eerdere blokken van hetzelfde bestand staan al in transacties
+        uniek = records.drop_duplicates(subset='fingerprint')
+
+        cursor.execute('DELETE FROM import_staging')
+        cursor.executemany(
+            'INSERT INTO import_staging (rij, fingerprint) VALUES (?, ?)',
+            uniek['fingerprint'].items()
+        )
+        cursor.execute('''
+            SELECT s.rij FROM import_staging s
+            WHERE NOT EXISTS (SELECT 1 FROM transacties t WHERE t.fingerprint = s.fingerprint)
+            ORDER BY s.rij
+        ''')
+        nieuwe_rijen = [rij for (rij,) in cursor.fetchall()]
+        nieuw = records.loc[nieuwe_rijen].copy()
+
+        # Categoriseer alle nieuwe rijen in één stap
+        nieuw['categorie'] = self.categorizer.categorize_batch(nieuw['naam'], nieuw['omschrijving'], nieuw['tegenrekening'])
+        # Alleen de fingerprint bewaren: de rijen worden na de import uit de database teruggezocht
+        ongecategoriseerd.extend(nieuw.loc[nieuw['categorie'].isna(), 'fingerprint'])
+        nieuw['categorie'] = nieuw['categorie'].fillna('Ongecategoriseerd')
+        nieuw['gebruiker_id'] = self.gebruiker_id
+
+        # Rekening en categorie worden opgeslagen als id; nieuwe waarden komen in rekeningen/categorieen
+        rekening_ids = self.db.get_account_ids(self.gebruiker_id, nieuw['rekening'].unique())
+        categorie_ids = self.db.get_or_add_category_ids(self.gebruiker_id, nieuw['categorie'], nieuw['bedrag'])
+        nieuw['rekening_id'] = nieuw['rekening'].map(rekening_ids).astype('Int64')
+        nieuw['categorie_id'] = nieuw['categorie'].map(categorie_ids).astype('Int64')
+
+        kolommen = ['datum', 'rekening_id', 'tegenrekening', 'naam', 'omschrijving', 'bedrag',
+                    'saldo_voor', 'valuta', 'categorie_id', 'rekeningtype', 'gebruiker_id', 'fingerprint']
+        cursor.executemany(
+            f'''
+            INSERT OR IGNORE INTO transacties ({', '.join(kolommen)})
+            VALUES ({', '.join('?' * len(kolommen))})
+            ''',
+            nieuw[kolommen].astype(object).where(nieuw[kolommen].notna(), None).itertuples(index=False, name=None)
+        )
+
+        return len(nieuw), len(records) - len(nieuw)
+
     def _handle_uncategorized_transactions(self, ongecategoriseerd):
         print(f"\n=== HANDMATIGE CATEGORISATIE VEREIST ===")
         print(f"{len(ongecategoriseerd)} transacties vereisen handmatige categorisatie")
 
-        # Haal alle categorieën op
-        alle_categorieën = self.db.get_categories(self.gebruiker_id)
-
-        print("\nOpties bij elke transactie:")
-        print("- Voer nummer in voor categorie")
-        print("- 'n' voor nieuwe categorie maken")
-        print("- 's' om te skippen (blijft ongecategoriseerd)")
-        print("- 'q' om te stoppen met categoriseren")
-
-        for item in ongecategoriseerd:
-            print(f"\n{'='*60}")
-            print(f"Datum:         {item['datum']}")
-            print(f"Rekening:      {item['rekening']}")
-            print(f"Tegenrekening: {item['tegenrekening']}")
-            print(f"Naam:          {item['naam']}")
-            print(f"Omschrijving:  {item['omschrijving']}")
-            print(f"Bedrag:        €{item['bedrag']:.2f}")
-            
-            # Filter categorieën op basis van bedrag (positief = inkomsten, negatief = uitgaven)
-            if item['bedrag'] > 0:
-                relevante_categorieën = [c for c in alle_categorieën if c[1] == 'inkomsten']
-                print(f"\nBeschikbare INKOMSTEN categorieën:")
-            else:
-                relevante_categorieën = [c for c in alle_categorieën if c[1] == 'uitgaven']
-                print(f"\nBeschikbare UITGAVEN categorieën:")
-            
-            for i, (cat_naam, cat_type, cat_desc) in enumerate(relevante_categorieën, 1):
-                print(f"{i:2d}. {cat_naam} ({cat_type})")
-
-            while True:
-                keuze = input("\nCategorie keuze: ").strip().lower()
-
-                if keuze == 'q':
-                    print("Categorisatie gestopt.")
-                    return
-                elif keuze == 's':
-                    break
-                elif keuze == 'n':
-                    nieuwe_cat = self.categorizer.create_new_category()
-                    if nieuwe_cat:
-                        self.categorizer.update_transaction_category(item, nieuwe_cat)
-                        if input("Wilt u een regel toevoegen voor toekomstige herkenning? (j/n): ").lower() == 'j':
-                            zoekterm = input("Zoekterm: ").strip()
-                            if zoekterm:
-                                self.categorizer.add_categorization_rule(zoekterm, nieuwe_cat)
-                    break
-                else:
-                    try:
-                        index = int(keuze) - 1
-                        if 0 <= index < len(relevante_categorieën):
-                            gekozen_categorie = relevante_categorieën[index][0]
-                            self.categorizer.update_transaction_category(item, gekozen_categorie)
-                            if input("Wilt u een regel toevoegen voor toekomstige herkenning? (j/n): ").lower() == 'j':
-                                zoekterm = input("Zoekterm: ").strip()
-                                if zoekterm:
-                                    self.categorizer.add_categorization_rule(zoekterm, gekozen_categorie)
-                            break
-                        else:
-                            print("Ongeldig nummer.")
-                    except ValueError:
-                        print("Ongeldige invoer.")
+        df = self._ongecategoriseerde_transacties(ongecategoriseerd)
+        if not df.empty:
+            self.categorizer.review_clusters(df)
+
+    def _ongecategoriseerde_transacties(self, fingerprints):
+        """Zoek de zojuist ingevoegde rijen op fingerprint terug, voor zover nog ongecategoriseerd"""
+        return self.db.query_df(
+            '''
+            SELECT id, datum, rekening, tegenrekening, naam, omschrijving, bedrag FROM transacties_overzicht
+            WHERE gebruiker_id = ? AND categorie = 'Ongecategoriseerd'
+              AND fingerprint IN (SELECT value FROM json_each(?))
+            ORDER BY id
+            ''',
+            (self.gebruiker_id, json.dumps(list(fingerprints)))
+        )
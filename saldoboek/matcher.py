@@ -0,0 +1,130 @@
+from collections import deque
+
+GEEN = float('inf')
+
+
+class RegelMatcher:
+    """Aho-Corasick automaat over de zoektermen van de categorisatieregels.
+
+    Alle termen worden in één doorgang over de tekst gevonden, ongeacht het
+    aantal regels. Bij meerdere treffers wint de term met de laagste
+    prioriteit; standaard is dat de term die het eerst is toegevoegd, net als
+    bij de oorspronkelijke lus over de regels. Nieuwe termen worden direct in
+    de trie ingevoegd; de faallinks worden pas bij de volgende zoekopdracht
+    opnieuw berekend, of meteen met bouw(). Een matcher die tussen threads
+    gedeeld wordt, moet vooraf gebouwd zijn.
+    """
+
+    def __init__(self, regels=None):
+        self._goto = [{}]
+        self._eind = [GEEN]
+        self._categorieen = {}
+        self._prioriteit = {}
+        self._volgende = 0
+        # (faallinks, beste treffer per toestand, laagste prioriteit), samen vervangen
+        self._automaat = None
+        for term, categorie in (regels or {}).items():
+            self.voeg_toe(term, categorie)
+
+    def __len__(self):
+        return len(self._categorieen)
+
+    def voeg_toe(self, term, categorie, prioriteit=None):
+        """Voeg een (kleine letters) zoekterm toe; een bestaande term houdt zijn prioriteit.
+
+        Zonder prioriteit (bijvoorbeeld het regel-id) komt de term achter alle
+        eerder toegevoegde termen.
+        """
+        if term in self._prioriteit:
+            self._categorieen[self._prioriteit[term]] = categorie
+            return
+
+        if prioriteit is None:
+            prioriteit = self._volgende
+        self._volgende = max(self._volgende, prioriteit + 1)
+        self._prioriteit[term] = prioriteit
+        self._categorieen[prioriteit] = categorie
+
+        toestand = 0
+        for teken in term:
+            volgende = self._goto[toestand].get(teken)
+            if volgende is None:
+                volgende = len(self._goto)
+                self._goto[toestand][teken] = volgende
+                self._goto.append({})
+                self._eind.append(GEEN)
+            toestand = volgende
+        self._eind[toestand] = min(self._eind[toestand], prioriteit)
+        self._automaat = None
+
+    def bouw(self):
+        """Bereken faallinks en per toestand de beste treffer (breadth-first); retourneert de automaat"""
+        goto = self._goto
+        fail = [0] * len(goto)
+        beste = list(self._eind)
+
+        wachtrij = deque(goto[0].values())
+        while wachtrij:
+            toestand = wachtrij.popleft()
+            for teken, volgende in goto[toestand].items():
+                terug = fail[toestand]
+                while terug and teken not in goto[terug]:
+                    terug = fail[terug]
+                if toestand:
+                    fail[volgende] = goto[terug].get(teken, 0)
+                # Een treffer in de faalketen telt ook mee (term is suffix van deze toestand)
+                beste[volgende] = min(beste[volgende], beste[fail[volgende]])
+                wachtrij.append(volgende)
+
+        # Eén toewijzing, zodat een andere thread nooit een half gebouwde automaat ziet
+        self._automaat = (fail, beste, min(self._categorieen, default=GEEN))
+        return self._automaat
+
+    def treffer(self, tekst):
+        """Geef (prioriteit, categorie) van de best passende term in tekst, of (GEEN, None)"""
+        automaat = self._automaat
+        if automaat is None:
+            automaat = self.bouw()
+        fail, beste, laagste = automaat
+        goto = self._goto
+
+        toestand = 0
+        gevonden = beste[0]
+        for teken in tekst:
+            while toestand and teken not in goto[toestand]:
+                toestand = fail[toestand]
+            toestand = goto[toestand].get(teken, 0)
+            if beste[toestand] < gevonden:
+                gevonden = beste[toestand]
+                if gevonden == laagste:
+                    break
+
+        return gevonden, self._categorieen.get(gevonden)
+
+    def zoek(self, tekst):
+        """Geef de categorie van de best passende term in tekst, of None"""
+        return self.treffer(tekst)[1]
+
+
+class GelaagdeMatcher:
+    """Zoekt in een gedeelde matcher met daarboven de matcher van één gebruiker.
+
+    Beide lagen gebruiken het regel-id als prioriteit. Een eigen regel die een
+    standaardregel overschrijft krijgt het id van die standaardregel; bij
+    gelijke prioriteit wint de bovenste laag.
+    """
+
+    def __init__(self, *lagen):
+        self.lagen = lagen
+
+    def __len__(self):
+        return sum(len(laag) for laag in self.lagen)
+
+    def zoek(self, tekst):
+        """Geef de categorie van de best passende term over alle lagen, of None"""
+        gevonden, categorie = GEEN, None
+        for laag in self.lagen:
+            prioriteit, kandidaat = laag.treffer(tekst)
+            if kandidaat is not None and prioriteit <= gevonden:
+                gevonden, categorie = prioriteit, kandidaat
+        return categorie
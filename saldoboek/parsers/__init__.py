@@ -3,8 +3,18 @@
 Bank parsers package voor verschillende bankformaten
 """
 from ..config.bank_parsers import BANK_PARSERS
-from .sns_parser import SNSParser
-from .rabo_parser import RaboParser
+from .format_parser import FormatParser
+from .statement_parser import STATEMENT_PARSERS, Camt053Parser, Mt940Parser
+from .sniffer import sniff_bestand
 
-# Dynamisch __all__ maken op basis van config
-__all__ = [f"{bank.title()}Parser" for bank in BANK_PARSERS.keys()]
+# Alle ondersteunde formaten: CSV-specs uit de registry en afschriftformaten
+FORMATEN = [*BANK_PARSERS, *STATEMENT_PARSERS]
+
+def get_parser(bank):
+    """Geef een parser voor een bankformaat uit de registry"""
+    if bank in STATEMENT_PARSERS:
+        return STATEMENT_PARSERS[bank]()
+    return FormatParser(bank)
+
+__all__ = ['BANK_PARSERS', 'STATEMENT_PARSERS', 'FORMATEN', 'FormatParser', 'Camt053Parser', 'Mt940Parser',
+           'get_parser', 'sniff_bestand']
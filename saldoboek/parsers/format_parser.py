@@ -0,0 +1,206 @@
+import pandas as pd
+import numpy as np
+import os
+from ..bedragen import reeks_naar_centen
+from ..config.bank_parsers import BANK_PARSERS
+
+class FormatParser:
+    """Generieke, gevectoriseerde parser gestuurd door een bankformaat-spec"""
+
+    def __init__(self, bank):
+        self.bank = bank
+        self.spec = BANK_PARSERS[bank]
+
+    def parse_csv(self, filepath, rekeningtype=None, encoding=None):
+        """Parse een CSV-bestand volgens de spec.
+
+        Met een vooraf bepaalde encoding wordt het bestand één keer gelezen,
+        anders worden de encodings uit de spec geprobeerd. Een leeg bestand
+        geeft een leeg DataFrame; leesfouten en een onjuiste kolomindeling
+        worden doorgegeven, zodat de importer het bestand als fout meldt.
+        """
+        df = self._read_csv_with_encoding(filepath, encoding)
+
+        if df.empty:
+            print(f"Waarschuwing: {filepath} is leeg")
+            return pd.DataFrame()
+
+        rekeningtype = rekeningtype or self._ask_account_type(filepath)
+
+        nieuwe_df = self._normalize(df, rekeningtype, filepath)
+        if nieuwe_df.empty:
+            return nieuwe_df
+
+        self._print_import_summary(filepath, nieuwe_df, rekeningtype)
+        return nieuwe_df
+
+    def iter_csv(self, filepath, rekeningtype=None, chunksize=50000, encoding=None):
+        """Lees een CSV in blokken van maximaal chunksize rijen.
+
+        Levert per blok een genormaliseerd DataFrame op, zodat het geheugengebruik
+        door de blokgrootte wordt bepaald en niet door de bestandsgrootte.
+        Leesfouten worden doorgegeven, zodat de aanroeper de import kan terugdraaien.
+        Het rekeningtype wordt meteen gevraagd: de blokken worden gelezen binnen
+        de importtransactie, en die mag niet op invoer wachten.
+        """
+        rekeningtype = rekeningtype or self._ask_account_type(filepath)
+        return self._iter_csv(filepath, rekeningtype, chunksize, encoding)
+
+    def _iter_csv(self, filepath, rekeningtype, chunksize, encoding):
+        """Generator achter iter_csv, met een bekend rekeningtype"""
+        aantal, datum_van, datum_tot = 0, None, None
+        for df in self._read_csv_chunks_with_encoding(filepath, chunksize, encoding):
+            nieuwe_df = self._normalize(df, rekeningtype, filepath)
+            if nieuwe_df.empty:
+                continue
+            aantal += len(nieuwe_df)
+            datum_van = nieuwe_df['datum'].min() if datum_van is None else min(datum_van, nieuwe_df['datum'].min())
+            datum_tot = nieuwe_df['datum'].max() if datum_tot is None else max(datum_tot, nieuwe_df['datum'].max())
+            yield nieuwe_df
+
+        if not aantal:
+            print(f"Waarschuwing: {filepath} is leeg")
+            return
+        print(f"✓ {os.path.basename(filepath)} succesvol gelezen: {aantal} transacties")
+        print(f"  Rekeningtype: {rekeningtype}")
+        print(f"  Periode: {datum_van.strftime('%d-%m-%Y')} tot {datum_tot.strftime('%d-%m-%Y')}")
+
+    def _read_options(self, encoding):
+        return {
+            'encoding': encoding,
+            'header': 0 if self.spec['header'] else None,
+            'sep': self.spec.get('sep', ','),
+            'quotechar': '"',
+            'dtype': str,
+        }
+
+    def _encodings(self, encoding=None):
+        """Te proberen encodings; een vooraf bepaalde encoding gaat voor"""
+        encodings = list(self.spec.get('encodings', ['utf-8']))
+        if encoding:
+            encodings = [encoding] + [e for e in encodings if e != encoding]
+        return encodings
+
+    def _read_csv_with_encoding(self, filepath, encoding=None):
+        """Lees CSV met de opgegeven encoding, of probeer de encodings uit de spec"""
+        for encoding in self._encodings(encoding):
+            try:
+                df = pd.read_csv(filepath, **self._read_options(encoding))
+                if not df.empty:
+                    print(f"  Bestand gelezen met encoding: {encoding}")
+                return df
+            except pd.errors.EmptyDataError:
+                return pd.DataFrame()
+            except UnicodeDecodeError:
+                continue
+            except Exception as e:
+                print(f"  Fout met encoding {encoding}: {e}")
+                continue
+
+        raise Exception("Kon bestand niet lezen met beschikbare encodings")
+
+    def _read_csv_chunks_with_encoding(self, filepath, chunksize, encoding=None):
+        """Bepaal de encoding op het eerste blok en lees daarna de rest in blokken.
+
+        Zonder vooraf bepaalde encoding (het begin van het bestand was alleen
+        ASCII) geldt de volgorde uit de spec, zodat een later niet-UTF-8 teken
+        geen fout geeft als de spec een single-byte encoding voorop zet.
+        """
+        for encoding in self._encodings(encoding):
+            try:
+                reader = pd.read_csv(filepath, chunksize=chunksize, **self._read_options(encoding))
+                eerste = next(reader, None)
+            except pd.errors.EmptyDataError:
+                return
+            except UnicodeDecodeError:
+                continue
+            if eerste is None:
+                return
+            print(f"  Bestand gelezen met encoding: {encoding}")
+            yield eerste
+            yield from reader
+            return
+
+        raise Exception("Kon bestand niet lezen met beschikbare encodings")
+
+    def _ask_account_type(self, filepath):
+        """Vraag gebruiker om rekeningtype"""
+        print(f"\nBestand: {filepath}")
+        while True:
+            keuze = input("Rekeningtype? (b = betaalrekening, s = spaarrekening): ").strip().lower()
+            if keuze == 'b':
+                return 'betaalrekening'
+            elif keuze == 's':
+                return 'spaarrekening'
+            else:
+                print("Ongeldige invoer. Kies 'b' voor betaalrekening of 's' voor spaarrekening.")
+
+    def _normalize(self, df, rekeningtype, filepath):
+        """Zet ruwe CSV-data om naar het gestandaardiseerde formaat"""
+        spec = self.spec
+        if spec['header']:
+            df.columns = df.columns.str.strip()
+
+        missing_columns = [col for col in spec.get('verplicht', []) if col not in df.columns]
+        if missing_columns:
+            raise Exception(f"Ontbrekende kolommen: {missing_columns}")
+
+        bronnen = list(spec['kolommen'].values()) + list(spec.get('omschrijving', []))
+        if sum(bron in df.columns for bron in bronnen) < spec.get('min_kolommen', 0):
+            raise Exception(f"Niet genoeg kolommen ({len(df.columns)} gevonden)")
+
+        kolom = lambda doel: df.get(spec['kolommen'].get(doel))
+        leeg = pd.Series('', index=df.index)
+
+        naam = kolom('naam')
+        naam = naam.fillna('') if naam is not None else leeg
+        valuta = kolom('valuta')
+        saldo = kolom('saldo_voor')
+
+        nieuwe_df = pd.DataFrame({
+            'datum': pd.to_datetime(kolom('datum'), format=spec['datum_formaat'], errors='coerce'),
+            'rekening': kolom('rekening'),
+            'tegenrekening': kolom('tegenrekening') if kolom('tegenrekening') is not None else leeg,
+            'naam': naam,
+            'valuta': valuta if valuta is not None else 'EUR',
+            'saldo_voor': self._convert_amount(saldo) if saldo is not None else 0,
+            'bedrag': self._convert_amount(kolom('bedrag')),
+            'omschrijving': self._merge_descriptions(df, naam),
+            'rekeningtype': rekeningtype,
+        })
+
+        # Verwijder rijen met ontbrekende essentiële data
+        nieuwe_df.dropna(subset=['datum', 'bedrag'], inplace=True)
+        nieuwe_df['bedrag'] = nieuwe_df['bedrag'].astype('int64')
+        return nieuwe_df
+
+    def _convert_amount(self, series):
+        """Converteer bedragen volgens de decimaal-conventie van de spec naar hele centen"""
+        vertaling = {}
+        if self.spec.get('duizendtal'):
+            vertaling[self.spec['duizendtal']] = None
+        if self.spec.get('decimaal', '.') != '.':
+            vertaling[self.spec['decimaal']] = '.'
+        if vertaling:
+            series = series.str.translate(str.maketrans(vertaling))
+        return reeks_naar_centen(series)
+
+    def _merge_descriptions(self, df, naam):
+        """Voeg omschrijvingskolommen samen tot één kolom; lege delen worden overgeslagen"""
+        kolommen = [col for col in self.spec.get('omschrijving', []) if col in df.columns]
+        if not kolommen:
+            return naam
+
+        omschrijving = df[kolommen[0]].fillna('')
+        for col in kolommen[1:]:
+            deel = df[col].fillna('')
+            scheiding = np.where((omschrijving != '') & (deel != ''), ' ', '')
+            omschrijving = omschrijving + scheiding + deel
+        return omschrijving.str.strip()
+
+    def _print_import_summary(self, filepath, df, rekeningtype):
+        """Print samenvatting van geïmporteerde data"""
+        print(f"✓ {os.path.basename(filepath)} succesvol gelezen: {len(df)} transacties")
+        print(f"  Rekeningtype: {rekeningtype}")
+        if not df.empty:
+            print(f"  Periode: {df['datum'].min().strftime('%d-%m-%Y')} tot {df['datum'].max().strftime('%d-%m-%Y')}")
@@ -0,0 +1,75 @@
+import codecs
+import csv
+import io
+import re
+from ..config.bank_parsers import BANK_PARSERS
+
+SNIFF_GROOTTE = 8192
+
+
+def _detect_encoding(sample):
+    """Bepaal de encoding op basis van een stuk van het bestand.
+
+    Bij alleen ASCII zegt de sample niets over de rest van het bestand; dan is
+    de encoding None en geldt de volgorde uit de spec van de bank.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.isascii():
+        return None
+    try:
+        # Een multibyte teken kan aan het eind van de sample zijn afgekapt
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'iso-8859-1'
+
+
+def _detect_statement(tekst):
+    """Herken CAMT.053 (XML) en MT940 afschriften aan hun inhoud"""
+    if tekst.lstrip().startswith('<') and 'camt.053' in tekst:
+        return 'CAMT053'
+    if re.search(r'^:20:', tekst, re.M) and re.search(r'^:25:', tekst, re.M):
+        return 'MT940'
+    return None
+
+
+def _detect_bank(eerste_regel):
+    """Herken de bank aan de kolomindeling van de eerste regel"""
+    for bank, spec in BANK_PARSERS.items():
+        reader = csv.reader(io.StringIO(eerste_regel), delimiter=spec.get('sep', ','))
+        velden = [veld.strip() for veld in next(reader, [])]
+        herkenning = spec.get('herkenning', {})
+        if spec['header']:
+            if set(herkenning.get('kolommen', [None])).issubset(velden):
+                return bank
+        elif len(velden) >= herkenning.get('min_velden', 1) and all(
+            positie < len(velden) and re.match(patroon, velden[positie])
+            for positie, patroon in herkenning.get('patronen', {}).items()
+        ):
+            return bank
+    return None
+
+
+def sniff_bestand(filepath, grootte=SNIFF_GROOTTE):
+    """Lees eenmalig het begin van een bestand en bepaal (bank, encoding).
+
+    De bank is None als de kolomindeling niet herkend wordt, de encoding als
+    het begin van het bestand alleen ASCII bevat.
+    """
+    with open(filepath, 'rb') as f:
+        sample = f.read(grootte)
+
+    encoding = _detect_encoding(sample)
+    tekst = sample.decode(encoding or 'ascii', errors='ignore')
+    afschrift = _detect_statement(tekst)
+    if afschrift:
+        return afschrift, encoding
+
+    eerste_regel = tekst.splitlines()[0] if tekst else ''
+    return _detect_bank(eerste_regel), encoding
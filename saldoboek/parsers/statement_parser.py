@@ -0,0 +1,249 @@
+import pandas as pd
+import os
+import re
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from ..bedragen import naar_centen
+from .format_parser import FormatParser
+
+KOLOMMEN = ['datum', 'rekening', 'tegenrekening', 'naam', 'valuta', 'saldo_voor', 'bedrag', 'omschrijving', 'rekeningtype']
+
+class StatementParser(ABC):
+    """Basis voor parsers van bankafschriften (CAMT.053, MT940).
+
+    Subklassen leveren de transacties één voor één op via _iter_records, zodat
+    het geheugengebruik niet afhangt van de grootte van het afschrift. De
+    interface is gelijk aan die van FormatParser, zodat de importer geen
+    onderscheid hoeft te maken.
+    """
+
+    _ask_account_type = FormatParser._ask_account_type
+    _print_import_summary = FormatParser._print_import_summary
+
+    def parse_csv(self, filepath, rekeningtype=None, encoding=None):
+        """Parse het volledige afschrift naar één DataFrame; leesfouten worden doorgegeven"""
+        rekeningtype = rekeningtype or self._ask_account_type(filepath)
+        blokken = list(self._iter_frames(filepath, rekeningtype, None, encoding))
+        if not blokken:
+            print(f"Waarschuwing: {filepath} is leeg")
+            return pd.DataFrame()
+
+        df = pd.concat(blokken, ignore_index=True)
+        self._print_import_summary(filepath, df, rekeningtype)
+        return df
+
+    def iter_csv(self, filepath, rekeningtype=None, chunksize=50000, encoding=None):
+        """Lees het afschrift in blokken van maximaal chunksize transacties.
+
+        Het rekeningtype wordt meteen gevraagd, buiten de importtransactie.
+        """
+        rekeningtype = rekeningtype or self._ask_account_type(filepath)
+        return self._iter_csv(filepath, rekeningtype, chunksize, encoding)
+
+    def _iter_csv(self, filepath, rekeningtype, chunksize, encoding):
+        """Generator achter iter_csv, met een bekend rekeningtype"""
+        aantal, datum_van, datum_tot = 0, None, None
+        for df in self._iter_frames(filepath, rekeningtype, chunksize, encoding):
+            aantal += len(df)
+            datum_van = df['datum'].min() if datum_van is None else min(datum_van, df['datum'].min())
+            datum_tot = df['datum'].max() if datum_tot is None else max(datum_tot, df['datum'].max())
+            yield df
+
+        if not aantal:
+            print(f"Waarschuwing: {filepath} is leeg")
+            return
+        print(f"✓ {os.path.basename(filepath)} succesvol gelezen: {aantal} transacties")
+        print(f"  Rekeningtype: {rekeningtype}")
+        print(f"  Periode: {datum_van.strftime('%d-%m-%Y')} tot {datum_tot.strftime('%d-%m-%Y')}")
+
+    def _iter_frames(self, filepath, rekeningtype, chunksize, encoding):
+        """Bundel records tot genormaliseerde DataFrames"""
+        records = []
+        for record in self._iter_records(filepath, encoding):
+            records.append(record)
+            if chunksize and len(records) >= chunksize:
+                yield self._to_frame(records, rekeningtype)
+                records = []
+        if records:
+            yield self._to_frame(records, rekeningtype)
+
+    def _to_frame(self, records, rekeningtype):
+        df = pd.DataFrame.from_records(records, columns=KOLOMMEN[:-1])
+        df['datum'] = pd.to_datetime(df['datum'], format='%Y-%m-%d', errors='coerce')
+        df['rekeningtype'] = rekeningtype
+        df.dropna(subset=['datum', 'bedrag'], inplace=True)
+        df['bedrag'] = df['bedrag'].astype('int64')
+        return df
+
+    @abstractmethod
+    def _iter_records(self, filepath, encoding):
+        """Lever de transacties van het afschrift één voor één op, als tuple in de volgorde van KOLOMMEN (zonder rekeningtype)"""
+
+
+def _lokaal(tag):
+    """Tagnaam zonder XML namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _tekst(element, pad):
+    gevonden = element.find(pad)
+    return gevonden.text.strip() if gevonden is not None and gevonden.text else ''
+
+
+class Camt053Parser(StatementParser):
+    """Parser voor ISO 20022 CAMT.053 XML afschriften (iterparse, streaming)"""
+
+    def _iter_records(self, filepath, encoding):
+        rekening, saldo = '', 0
+        pad = []
+
+        for event, elem in ET.iterparse(filepath, events=('start', 'end')):
+            if event == 'start':
+                pad.append(elem)
+                continue
+
+            pad.pop()
+            naam = _lokaal(elem.tag)
+            ouder = _lokaal(pad[-1].tag) if pad else None
+
+            if naam == 'Acct' and ouder == 'Stmt':
+                rekening = _tekst(elem, '{*}Id/{*}IBAN') or _tekst(elem, '{*}Id/{*}Othr/{*}Id')
+            elif naam == 'Bal' and ouder == 'Stmt':
+                if _tekst(elem, '{*}Tp/{*}CdOrPrtry/{*}Cd') in ('OPBD', 'PRCD'):
+                    saldo = self._bedrag(elem)
+            elif naam == 'Ntry':
+                record = self._parse_entry(elem, rekening, saldo)
+                saldo += record[6]
+                yield record
+                # Verwerkte entries uit de boom verwijderen houdt het geheugen vlak
+                pad[-1].remove(elem)
+            elif naam == 'Stmt' and pad:
+                pad[-1].remove(elem)
+
+    def _bedrag(self, elem):
+        bedrag = naar_centen(_tekst(elem, '{*}Amt') or 0)
+        return -bedrag if _tekst(elem, '{*}CdtDbtInd') == 'DBIT' else bedrag
+
+    def _parse_entry(self, ntry, rekening, saldo):
+        bedrag = self._bedrag(ntry)
+        amt = ntry.find('{*}Amt')
+        datum = _tekst(ntry, '{*}BookgDt/{*}Dt') or _tekst(ntry, '{*}BookgDt/{*}DtTm')[:10] \
+            or _tekst(ntry, '{*}ValDt/{*}Dt')
+
+        # Tegenpartij is de crediteur bij afschrijvingen en de debiteur bij bijschrijvingen
+        partij = 'Cdtr' if bedrag < 0 else 'Dbtr'
+        partijen = ntry.find('.//{*}RltdPties')
+        naam = tegenrekening = ''
+        if partijen is not None:
+            naam = _tekst(partijen, f'{{*}}{partij}/{{*}}Nm') or _tekst(partijen, f'{{*}}{partij}/{{*}}Pty/{{*}}Nm')
+            tegenrekening = _tekst(partijen, f'{{*}}{partij}Acct/{{*}}Id/{{*}}IBAN') \
+                or _tekst(partijen, f'{{*}}{partij}Acct/{{*}}Id/{{*}}Othr/{{*}}Id')
+
+        omschrijving = ' '.join(
+            u.text.strip() for u in ntry.iterfind('.//{*}RmtInf/{*}Ustrd') if u.text and u.text.strip()
+        ) or _tekst(ntry, './/{*}AddtlTxInf') or _tekst(ntry, '{*}AddtlNtryInf')
+
+        return (
+            datum, rekening, tegenrekening, naam,
+            amt.get('Ccy', 'EUR') if amt is not None else 'EUR',
+            saldo, bedrag, omschrijving
+        )
+
+
+MT940_TAG = re.compile(r'^:(\d{2}[A-Z]?):(.*)$')
+MT940_REGEL = re.compile(
+    r'^(?P<valutadatum>\d{6})(?P<boekdatum>\d{4})?(?P<dc>R?[CD])[A-Z]?(?P<bedrag>\d+,\d*)'
+)
+MT940_SALDO = re.compile(r'^(?P<dc>[CD])(?P<datum>\d{6})(?P<valuta>[A-Z]{3})(?P<bedrag>\d+,\d*)')
+MT940_VELD = re.compile(r'/(NAME|IBAN|REMI|CNTP|EREF)/(.*?)(?=/(?:NAME|IBAN|REMI|CNTP|EREF|BIC|ORDP|BENM|MARF|CSID|RTRN|PURP|ULTD|ULTC|TRCD|BUSP)/|$)')
+
+
+class Mt940Parser(StatementParser):
+    """Parser voor SWIFT MT940 afschriften (regel voor regel, streaming)"""
+
+    def _iter_records(self, filepath, encoding):
+        rekening, valuta, saldo = '', 'EUR', 0
+        regel61, info = None, []
+
+        with open(filepath, 'r', encoding=encoding or 'iso-8859-1') as f:
+            for tag, waarde in self._iter_tags(f):
+                if tag in ('61', '62F', '62M', '20', '25', '60F', '60M') and regel61:
+                    record = self._record(regel61, info, rekening, valuta, saldo)
+                    if record:
+                        saldo += record[6]
+                        yield record
+                    regel61, info = None, []
+
+                if tag == '25':
+                    rekening = re.sub(r'(?<=\d)[A-Z]{3}$', '', waarde.strip().replace(' ', ''))
+                elif tag in ('60F', '60M'):
+                    match = MT940_SALDO.match(waarde.strip())
+                    if match:
+                        valuta = match['valuta']
+                        saldo = self._getal(match['bedrag']) * (-1 if match['dc'] == 'D' else 1)
+                elif tag == '61':
+                    regel61 = waarde.strip()
+                elif tag == '86' and regel61:
+                    info.append(waarde)
+
+        if regel61:
+            record = self._record(regel61, info, rekening, valuta, saldo)
+            if record:
+                yield record
+
+    def _iter_tags(self, regels):
+        """Groepeer regels per tag; vervolgregels horen bij de vorige tag"""
+        tag, waarde = None, []
+        for regel in regels:
+            regel = regel.rstrip('\r\n')
+            match = MT940_TAG.match(regel)
+            if match:
+                if tag:
+                    yield tag, '\n'.join(waarde)
+                tag, waarde = match.group(1), [match.group(2)]
+            elif tag and regel and not regel.startswith(('-', '{', '}')):
+                waarde.append(regel)
+        if tag:
+            yield tag, '\n'.join(waarde)
+
+    def _getal(self, tekst):
+        return naar_centen(tekst.replace(',', '.'))
+
+    def _record(self, regel61, info, rekening, valuta, saldo):
+        match = MT940_REGEL.match(regel61)
+        if not match:
+            return None
+
+        bedrag = self._getal(match['bedrag'])
+        # D en RC (terugboeking van een bijschrijving) zijn afschrijvingen
+        if match['dc'] in ('D', 'RC'):
+            bedrag = -bedrag
+
+        jaar = 2000 + int(match['valutadatum'][:2])
+        maand, dag = match['valutadatum'][2:4], match['valutadatum'][4:6]
+        if match['boekdatum']:
+            boekmaand, dag = match['boekdatum'][:2], match['boekdatum'][2:]
+            if maand == '12' and boekmaand == '01':
+                jaar += 1
+            elif maand == '01' and boekmaand == '12':
+                jaar -= 1
+            maand = boekmaand
+        datum = f"{jaar:04d}-{maand}-{dag}"
+
+        tekst = ''.join(info).replace('\n', '')
+        velden = dict(MT940_VELD.findall(tekst))
+        naam = velden.get('NAME', '')
+        tegenrekening = velden.get('IBAN', '')
+        if 'CNTP' in velden:
+            delen = velden['CNTP'].split('/')
+            tegenrekening = tegenrekening or delen[0]
+            naam = naam or (delen[2] if len(delen) > 2 else '')
+        omschrijving = velden.get('REMI', '') or ' '.join(regel.strip() for regel in info)
+
+        return (datum, rekening, tegenrekening.strip(), naam.strip(), valuta, saldo, bedrag, omschrijving.strip())
+
+
+STATEMENT_PARSERS = {
+    'CAMT053': Camt053Parser,
+    'MT940': Mt940Parser,
+}
@@ -0,0 +1,96 @@
+import threading
+
+from .matcher import GelaagdeMatcher, RegelMatcher
+
+
+class Regelset:
+    """Gecompileerde regels: zoekterm -> categorie (op prioriteit), IBAN -> categorie en de matcher"""
+
+    def __init__(self, regels, prioriteiten, iban_regels, matcher):
+        self.regels = regels
+        self.prioriteiten = prioriteiten
+        self.iban_regels = iban_regels
+        self.matcher = matcher
+
+    def __bool__(self):
+        return bool(self.regels or self.iban_regels)
+
+
+class RegelOpslag:
+    """Procesbrede opslag van gecompileerde regels, gedeeld door alle Categorizers.
+
+    De standaardregels worden per regelversie één keer gecompileerd; per
+    gebruiker komt daar een laag met eigen regels bovenop. De sleutel is
+    (gebruiker, regelversies) uit de database, zodat een wijziging, ook door
+    een ander proces, bij de volgende opvraag vanzelf wordt opgemerkt.
+    Regelsets zijn gedeeld en worden daarom nooit aangepast.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._standaard = {}
+        self._gebruikers = {}
+        self.compilaties = 0
+
+    def voor(self, db, gebruiker_id):
+        """Geef de actuele Regelset van een gebruiker"""
+        versies = db.get_rule_versions(gebruiker_id)
+        database = str(db.db_path)
+        with self._lock:
+            versie, regelset = self._gebruikers.get((database, gebruiker_id), (None, None))
+            if versie == versies:
+                return regelset
+
+            standaard_versie, standaard = self._standaard.get(database, (None, None))
+            if standaard_versie != versies[0]:
+                standaard = self._laad(db, None)
+                self._standaard[database] = (versies[0], standaard)
+
+            eigen = self._laad(db, gebruiker_id, standaard)
+            regelset = self._combineer(standaard, eigen)
+            self._gebruikers[(database, gebruiker_id)] = (versies, regelset)
+            return regelset
+
+    def _laad(self, db, gebruiker_id, standaard=None):
+        """Compileer de actieve regels van één laag (gebruiker_id None voor de standaardregels).
+
+        Het regel-id is de prioriteit; een eigen regel voor een zoekterm die ook
+        een standaardregel heeft, neemt de prioriteit van die standaardregel over.
+        """
+        self.compilaties += 1
+        regels, prioriteiten = {}, {}
+        matcher = RegelMatcher()
+        for id_, zoekterm, categorie in db.execute(
+            'SELECT id, zoekterm, categorie FROM categorisatie_regels WHERE actief = 1 AND gebruiker_id IS ? ORDER BY id',
+            (gebruiker_id,),
+            fetch=True
+        ):
+            zoekterm = zoekterm.lower()
+            if zoekterm not in prioriteiten:
+                prioriteiten[zoekterm] = standaard.prioriteiten.get(zoekterm, id_) if standaard else id_
+            regels[zoekterm] = categorie
+            matcher.voeg_toe(zoekterm, categorie, prioriteiten[zoekterm])
+        # Bouwen onder de lock, voordat de matcher gedeeld wordt
+        matcher.bouw()
+
+        iban_regels = dict(db.execute(
+            'SELECT iban, categorie FROM iban_regels WHERE actief = 1 AND gebruiker_id IS ? ORDER BY id',
+            (gebruiker_id,),
+            fetch=True
+        ))
+        return Regelset(regels, prioriteiten, iban_regels, matcher)
+
+    def _combineer(self, standaard, eigen):
+        """Leg de eigen regels over de standaardregels; zonder eigen regels wordt alles gedeeld"""
+        if not eigen:
+            return standaard
+        prioriteiten = {**standaard.prioriteiten, **eigen.prioriteiten}
+        regels = {
+            zoekterm: eigen.regels.get(zoekterm, standaard.regels.get(zoekterm))
+            for zoekterm in sorted(prioriteiten, key=prioriteiten.get)
+        }
+        matcher = GelaagdeMatcher(standaard.matcher, eigen.matcher) if eigen.regels else standaard.matcher
+        return Regelset(regels, prioriteiten, {**standaard.iban_regels, **eigen.iban_regels}, matcher)
+
+
+REGELS = RegelOpslag()
@@ -11,6 +11,8 @@ import pandas as pd
 from openpyxl import Workbook
 from datetime import datetime
 
+from ..database import jaar_bereik
+
 class ReportGenerator:
     def __init__(self, db_manager):
         self.db = db_manager
@@ -19,17 +21,22 @@ class ReportGenerator:
         if not output_path:
             output_path = f"{gebruiker_id}_jaaroverzicht_{jaar}.xlsx"
 
+        # Geaggregeerde sheets lezen uit de maandtotalen; alleen de transactie- en saldosheets hebben de losse rijen nodig
+        totalen = self.db.get_month_totals(gebruiker_id, jaar)
+
+        if totalen.empty:
+            print(f"Geen transacties gevonden voor {jaar}")
+            return
+
+        totalen['maand'] = pd.PeriodIndex(totalen['maand'], freq='M')
+
         query = """
             SELECT datum, rekening, tegenrekening, naam, omschrijving, bedrag, saldo_voor, categorie, rekeningtype
-            FROM transacties
-            WHERE strftime('%Y', datum) = ? AND gebruiker_id = ?
+            FROM transacties_overzicht
+            WHERE gebruiker_id = ? AND datum >= ? AND datum < ?
             ORDER BY datum
         """
-        rows = self.db.execute(query, (str(jaar), gebruiker_id), fetch=True)
-
-        if not rows:
-            print(f"Geen transacties gevonden voor {jaar}")
-            return
+        rows = self.db.execute(query, (gebruiker_id, *jaar_bereik(jaar)), fetch=True)
 
         columns = ['datum', 'rekening', 'tegenrekening', 'naam', 'omschrijving', 'bedrag', 'saldo_voor', 'categorie', 'rekeningtype']
         df = pd.DataFrame(rows, columns=columns)
@@ -38,27 +45,27 @@ class ReportGenerator:
         wb.remove(wb.active)
 
         # Sheets voor alle rekeningen samen
-        create_overview_sheet(wb, df, jaar)
-        create_monthly_sheet(wb, df, jaar)
+        create_overview_sheet(wb, totalen, jaar)
+        create_monthly_sheet(wb, totalen, jaar)
         create_transactions_sheet(wb, df, jaar)
         create_balance_sheet(wb, df, jaar)
 
         # Sheets die optioneel per rekening worden gesplitst
         if split_per_rekening:
-            for rekening in df['rekening'].unique():
-                df_rekening = df[df['rekening'] == rekening]
+            for rekening in totalen['rekening'].unique():
+                totalen_rekening = totalen[totalen['rekening'] == rekening]
 
                 # Eerste 4 + laatste 4 tekens van de rekening
                 rekening_kort = rekening[4:8] + rekening[-4:] if rekening else ""
                 suffix = f" {rekening_kort}" if rekening else ""
-                create_income_sheet(wb, df_rekening, jaar, suffix)
-                create_expenses_sheet(wb, df_rekening, jaar, suffix)
-                create_monthly_category_sheet(wb, df_rekening, jaar, suffix)
+                create_income_sheet(wb, totalen_rekening, jaar, suffix)
+                create_expenses_sheet(wb, totalen_rekening, jaar, suffix)
+                create_monthly_category_sheet(wb, totalen_rekening, jaar, suffix)
         else:
-            create_income_sheet(wb, df, jaar)
-            create_expenses_sheet(wb, df, jaar)
-            create_monthly_category_sheet(wb, df, jaar)
+            create_income_sheet(wb, totalen, jaar)
+            create_expenses_sheet(wb, totalen, jaar)
+            create_monthly_category_sheet(wb, totalen, jaar)
 
         wb.save(output_path)
         print(f"✓ Excel rapport opgeslagen: {output_path}")
-        print_report_summary(df, jaar)
+        print_report_summary(totalen, jaar)
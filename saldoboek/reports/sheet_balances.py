@@ -1,6 +1,7 @@
 from openpyxl.styles import Font, PatternFill
 from openpyxl.utils import get_column_letter
 import pandas as pd
+from ..bedragen import euro
 
 def create_balance_sheet(wb, df, jaar, suffix=""):
     ws = wb.create_sheet(f"Rekening Saldi{suffix}")
@@ -40,11 +41,11 @@ def create_balance_sheet(wb, df, jaar, suffix=""):
         ws.cell(row=row, column=1, value=rekening)
         ws.cell(row=row, column=2, value=eerste['rekeningtype'])
         ws.cell(row=row, column=3, value=len(df_rek))
-        ws.cell(row=row, column=4, value=df_rek['bedrag'].sum()).number_format = '#,##0.00'
+        ws.cell(row=row, column=4, value=euro(df_rek['bedrag'].sum())).number_format = '#,##0.00'
         ws.cell(row=row, column=5, value=eerste_datum)
         ws.cell(row=row, column=6, value=laatste_datum)
-        ws.cell(row=row, column=7, value=beginsaldo).number_format = '#,##0.00'
-        ws.cell(row=row, column=8, value=eindsaldo).number_format = '#,##0.00'
+        ws.cell(row=row, column=7, value=euro(beginsaldo)).number_format = '#,##0.00'
+        ws.cell(row=row, column=8, value=euro(eindsaldo)).number_format = '#,##0.00'
 
         row += 1
 
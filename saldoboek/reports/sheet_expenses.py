@@ -1,16 +1,16 @@
-def create_expenses_sheet(wb, df, jaar, suffix=""):
+def create_expenses_sheet(wb, totalen, jaar, suffix=""):
     from openpyxl.styles import Font, PatternFill
     from openpyxl.utils import get_column_letter
+    from ..bedragen import euro
 
     ws = wb.create_sheet(f"Uitgaven{suffix}")
-    uitgaven_df = df[df['bedrag'] < 0].copy()
-    uitgaven_df['bedrag'] = abs(uitgaven_df['bedrag'])
+    uitgaven_df = totalen[totalen['aantal_uit'] > 0]
 
     if uitgaven_df.empty:
         ws['A1'] = "Geen uitgaven gevonden"
         return
 
-    categorie_totalen = uitgaven_df.groupby('categorie')['bedrag'].agg(['sum', 'count']).reset_index()
+    categorie_totalen = uitgaven_df.groupby('categorie', observed=True)[['uitgaven', 'aantal_uit']].sum().reset_index()
     categorie_totalen.columns = ['Categorie', 'Totaal', 'Aantal transacties']
     categorie_totalen = categorie_totalen.sort_values('Totaal', ascending=False)
 
@@ -30,14 +30,14 @@ def create_expenses_sheet(wb, df, jaar, suffix=""):
     for _, row in categorie_totalen.iterrows():
         ws.append([
             row['Categorie'],
-            row['Totaal'],
+            euro(row['Totaal']),
             row['Aantal transacties'],
-            row['Totaal'] / row['Aantal transacties'],
+            euro(row['Totaal'] / row['Aantal transacties']),
             row['Totaal'] / totaal_uitgaven
         ])
 
-    ws.append(["TOTAAL (excl. Sparen/Overboeken)", totaal_excl, aantal_excl, "", totaal_excl / totaal_uitgaven])
-    ws.append(["TOTAAL (incl. alles)", totaal_uitgaven, aantal, "", 1.0])
+    ws.append(["TOTAAL (excl. Sparen/Overboeken)", euro(totaal_excl), aantal_excl, "", totaal_excl / totaal_uitgaven])
+    ws.append(["TOTAAL (incl. alles)", euro(totaal_uitgaven), aantal, "", 1.0])
 
     for col in ws.columns:
         max_length = max(len(str(cell.value or "")) for cell in col)
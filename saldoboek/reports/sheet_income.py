@@ -1,15 +1,16 @@
-def create_income_sheet(wb, df, jaar, suffix=""):
+def create_income_sheet(wb, totalen, jaar, suffix=""):
     from openpyxl.styles import Font, PatternFill
     from openpyxl.utils import get_column_letter
+    from ..bedragen import euro
 
     ws = wb.create_sheet(f"Inkomsten{suffix}")
-    inkomsten_df = df[df['bedrag'] > 0].copy()
+    inkomsten_df = totalen[totalen['aantal_in'] > 0]
 
     if inkomsten_df.empty:
         ws['A1'] = "Geen inkomsten gevonden"
         return
 
-    categorie_totalen = inkomsten_df.groupby('categorie')['bedrag'].agg(['sum', 'count']).reset_index()
+    categorie_totalen = inkomsten_df.groupby('categorie', observed=True)[['inkomsten', 'aantal_in']].sum().reset_index()
     categorie_totalen.columns = ['Categorie', 'Totaal', 'Aantal transacties']
     categorie_totalen = categorie_totalen.sort_values('Totaal', ascending=False)
 
@@ -24,9 +25,9 @@ def create_income_sheet(wb, df, jaar, suffix=""):
     for _, row in categorie_totalen.iterrows():
         ws.append([
             row['Categorie'],
-            row['Totaal'],
+            euro(row['Totaal']),
             row['Aantal transacties'],
-            row['Totaal'] / row['Aantal transacties']
+            euro(row['Totaal'] / row['Aantal transacties'])
         ])
 
     totaal = categorie_totalen['Totaal'].sum()
@@ -34,8 +35,8 @@ def create_income_sheet(wb, df, jaar, suffix=""):
     aantal = categorie_totalen['Aantal transacties'].sum()
     aantal_excl = categorie_totalen[~categorie_totalen['Categorie'].isin(['Overboekingen ontvangen'])]['Aantal transacties'].sum()
 
-    ws.append(["TOTAAL (excl. Overboekingen ontvangen)", totaal_excl, aantal_excl, ""])
-    ws.append(["TOTAAL (incl. alles)", totaal, aantal, ""])
+    ws.append(["TOTAAL (excl. Overboekingen ontvangen)", euro(totaal_excl), aantal_excl, ""])
+    ws.append(["TOTAAL (incl. alles)", euro(totaal), aantal, ""])
 
     for col in ws.columns:
         max_length = max(len(str(cell.value or "")) for cell in col)
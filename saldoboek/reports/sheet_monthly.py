@@ -1,18 +1,15 @@
 from openpyxl.styles import Font, PatternFill
 from openpyxl.utils import get_column_letter
 import pandas as pd
+from ..bedragen import euro
 
-def create_monthly_sheet(wb, df, jaar, suffix=""):
+def create_monthly_sheet(wb, totalen, jaar, suffix=""):
     """Maandelijks overzicht van inkomsten en uitgaven"""
     ws = wb.create_sheet(f"Maandoverzicht{suffix}")
 
-    # Zet maand als periode (bijv. 2024-03)
-    df_monthly = df.copy()
-    df_monthly['maand'] = pd.to_datetime(df_monthly['datum']).dt.to_period('M')
-
     # Groepeer per maand
-    inkomsten = df_monthly[df_monthly['bedrag'] > 0].groupby('maand')['bedrag'].sum()
-    uitgaven = df_monthly[df_monthly['bedrag'] < 0].groupby('maand')['bedrag'].sum().abs()
+    inkomsten = totalen.groupby('maand')['inkomsten'].sum()
+    uitgaven = totalen.groupby('maand')['uitgaven'].sum()
 
     # Maak volledige lijst van maanden van januari t/m december
     alle_maanden = pd.period_range(start=f"{jaar}-01", end=f"{jaar}-12", freq='M')
@@ -21,7 +18,7 @@ def create_monthly_sheet(wb, df, jaar, suffix=""):
     monthly_summary = pd.DataFrame(index=alle_maanden)
     monthly_summary['inkomsten'] = inkomsten
     monthly_summary['uitgaven'] = uitgaven
-    monthly_summary = monthly_summary.fillna(0)
+    monthly_summary = monthly_summary.fillna(0).astype('int64')
     monthly_summary['netto'] = monthly_summary['inkomsten'] - monthly_summary['uitgaven']
 
     # Titel en headers
@@ -38,9 +35,9 @@ def create_monthly_sheet(wb, df, jaar, suffix=""):
     # Data invullen
     for i, (maand, row) in enumerate(monthly_summary.iterrows(), start=4):
         ws.cell(row=i, column=1, value=str(maand))
-        ws.cell(row=i, column=2, value=row['inkomsten']).number_format = '#,##0.00'
-        ws.cell(row=i, column=3, value=row['uitgaven']).number_format = '#,##0.00'
-        ws.cell(row=i, column=4, value=row['netto']).number_format = '#,##0.00'
+        ws.cell(row=i, column=2, value=euro(row['inkomsten'])).number_format = '#,##0.00'
+        ws.cell(row=i, column=3, value=euro(row['uitgaven'])).number_format = '#,##0.00'
+        ws.cell(row=i, column=4, value=euro(row['netto'])).number_format = '#,##0.00'
 
     # Auto-breedte
     for column in ws.columns:
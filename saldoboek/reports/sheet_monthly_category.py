@@ -1,16 +1,12 @@
 from openpyxl.styles import Font, PatternFill
 from openpyxl.utils import get_column_letter
-import pandas as pd
+from ..bedragen import euro
 
-def create_monthly_category_sheet(wb, df, jaar, suffix=""):
+def create_monthly_category_sheet(wb, totalen, jaar, suffix=""):
     ws = wb.create_sheet(f"Maand-Categorie{suffix}")
 
-    df_analysis = df.copy()
-    df_analysis['maand'] = pd.to_datetime(df_analysis['datum']).dt.to_period('M')
-
-    inkomsten_df = df_analysis[df_analysis['bedrag'] > 0]
-    uitgaven_df = df_analysis[df_analysis['bedrag'] < 0].copy()
-    uitgaven_df['bedrag'] = abs(uitgaven_df['bedrag'])
+    inkomsten_df = totalen[totalen['aantal_in'] > 0]
+    uitgaven_df = totalen[totalen['aantal_uit'] > 0]
 
     ws['A1'] = f"Maand-Categorie Analyse {jaar}"
     ws['A1'].font = Font(bold=True, size=16)
@@ -26,9 +22,10 @@ def create_monthly_category_sheet(wb, df, jaar, suffix=""):
         inkomsten_pivot = inkomsten_df.pivot_table(
             index='categorie',
             columns='maand',
-            values='bedrag',
+            values='inkomsten',
             aggfunc='sum',
-            fill_value=0
+            fill_value=0,
+            observed=True
         )
 
         ws[f'A{current_row}'] = "Categorie"
@@ -54,12 +51,12 @@ def create_monthly_category_sheet(wb, df, jaar, suffix=""):
             for maand in inkomsten_pivot.columns:
                 bedrag = inkomsten_pivot.loc[categorie, maand]
                 if bedrag > 0:
-                    cell = ws.cell(row=current_row, column=col, value=bedrag)
+                    cell = ws.cell(row=current_row, column=col, value=euro(bedrag))
                     cell.number_format = '#,##0.00'
                     row_total += bedrag
                 col += 1
             if row_total > 0:
-                cell = ws.cell(row=current_row, column=col, value=row_total)
+                cell = ws.cell(row=current_row, column=col, value=euro(row_total))
                 cell.number_format = '#,##0.00'
                 cell.font = Font(bold=True)
             current_row += 1
@@ -71,12 +68,12 @@ def create_monthly_category_sheet(wb, df, jaar, suffix=""):
         for maand in inkomsten_pivot.columns:
             maand_total = inkomsten_pivot[maand].sum()
             if maand_total > 0:
-                cell = ws.cell(row=current_row, column=col, value=maand_total)
+                cell = ws.cell(row=current_row, column=col, value=euro(maand_total))
                 cell.number_format = '#,##0.00'
                 cell.font = Font(bold=True)
                 grand_total += maand_total
             col += 1
-        cell = ws.cell(row=current_row, column=col, value=grand_total)
+        cell = ws.cell(row=current_row, column=col, value=euro(grand_total))
         cell.number_format = '#,##0.00'
         cell.font = Font(bold=True, color="008000")
 
@@ -90,9 +87,10 @@ def create_monthly_category_sheet(wb, df, jaar, suffix=""):
         uitgaven_pivot = uitgaven_df.pivot_table(
             index='categorie',
             columns='maand',
-            values='bedrag',
+            values='uitgaven',
             aggfunc='sum',
-            fill_value=0
+            fill_value=0,
+            observed=True
         )
 
         ws[f'A{current_row}'] = "Categorie"
@@ -118,12 +116,12 @@ def create_monthly_category_sheet(wb, df, jaar, suffix=""):
             for maand in uitgaven_pivot.columns:
                 bedrag = uitgaven_pivot.loc[categorie, maand]
                 if bedrag > 0:
-                    cell = ws.cell(row=current_row, column=col, value=bedrag)
+                    cell = ws.cell(row=current_row, column=col, value=euro(bedrag))
                     cell.number_format = '#,##0.00'
                     row_total += bedrag
                 col += 1
             if row_total > 0:
-                cell = ws.cell(row=current_row, column=col, value=row_total)
+                cell = ws.cell(row=current_row, column=col, value=euro(row_total))
                 cell.number_format = '#,##0.00'
                 cell.font = Font(bold=True)
             current_row += 1
@@ -135,12 +133,12 @@ def create_monthly_category_sheet(wb, df, jaar, suffix=""):
         for maand in uitgaven_pivot.columns:
             maand_total = uitgaven_pivot[maand].sum()
             if maand_total > 0:
-                cell = ws.cell(row=current_row, column=col, value=maand_total)
+                cell = ws.cell(row=current_row, column=col, value=euro(maand_total))
                 cell.number_format = '#,##0.00'
                 cell.font = Font(bold=True)
                 grand_total += maand_total
             col += 1
-        cell = ws.cell(row=current_row, column=col, value=grand_total)
+        cell = ws.cell(row=current_row, column=col, value=euro(grand_total))
         cell.number_format = '#,##0.00'
         cell.font = Font(bold=True, color="CC0000")
 
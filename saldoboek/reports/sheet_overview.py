@@ -1,23 +1,24 @@
 import pandas as pd
+from ..bedragen import euro
 
-def get_interne_overboekingen_per_rekening(df):
-    sparen = df[(df['bedrag'] < 0) & (df['categorie'] == 'Sparen/Overboeken')].copy()
-    sparen['bedrag'] = sparen['bedrag'].abs()
-    ob_ontvangen = df[(df['bedrag'] > 0) & (df['categorie'] == 'Overboekingen ontvangen')]
-    rente = df[(df['bedrag'] > 0) & (df['categorie'] == 'Rente')]
+def get_interne_overboekingen_per_rekening(totalen):
+    sparen = totalen[(totalen['aantal_uit'] > 0) & (totalen['categorie'] == 'Sparen/Overboeken')]
+    ob_ontvangen = totalen[(totalen['aantal_in'] > 0) & (totalen['categorie'] == 'Overboekingen ontvangen')]
+    rente = totalen[(totalen['aantal_in'] > 0) & (totalen['categorie'] == 'Rente')]
     
     # Sparen/overboeken per rekening
-    sparen_per_rekening = sparen.groupby('rekening')['bedrag'].sum().reset_index(name='sparen')
-    ob_per_rekening = ob_ontvangen.groupby('rekening')['bedrag'].sum().reset_index(name='ontvangen')
-    rente_per_rekening = rente.groupby('rekening')['bedrag'].sum().reset_index(name='rente')
+    sparen_per_rekening = sparen.groupby('rekening', observed=True)['uitgaven'].sum().reset_index(name='sparen')
+    ob_per_rekening = ob_ontvangen.groupby('rekening', observed=True)['inkomsten'].sum().reset_index(name='ontvangen')
+    rente_per_rekening = rente.groupby('rekening', observed=True)['inkomsten'].sum().reset_index(name='rente')
     
     from functools import reduce
     dfs = [sparen_per_rekening, ob_per_rekening, rente_per_rekening]
     samengevoegd = reduce(lambda left, right: pd.merge(left, right, on='rekening', how='outer'), dfs)
-    samengevoegd = samengevoegd.fillna(0)
+    kolommen = ['sparen', 'ontvangen', 'rente']
+    samengevoegd[kolommen] = samengevoegd[kolommen].fillna(0).astype('int64')
     return samengevoegd
 
-def create_overview_sheet(wb, df, jaar, suffix=""):
+def create_overview_sheet(wb, totalen, jaar, suffix=""):
     from openpyxl.styles import Font
     from openpyxl.utils import get_column_letter
     from datetime import datetime
@@ -32,58 +33,53 @@ def create_overview_sheet(wb, df, jaar, suffix=""):
     ws['A4'] = "Gegenereerd op:"
     ws['B4'] = datetime.now().strftime("%d-%m-%Y %H:%M")
     
-    # Filter dataframes
-    inkomsten_df = df[df['bedrag'] > 0].copy()
-    uitgaven_df = df[df['bedrag'] < 0].copy()
-    uitgaven_df['bedrag'] = uitgaven_df['bedrag'].abs()
-    
     # Bereken externe bedragen (zonder interne overboekingen)
-    externe_inkomsten = inkomsten_df[(inkomsten_df['categorie'] != 'Overboekingen ontvangen')]['bedrag'].sum()
-    externe_uitgaven = uitgaven_df[~uitgaven_df['categorie'].isin(['Sparen/Overboeken'])]['bedrag'].sum()
+    externe_inkomsten = totalen[totalen['categorie'] != 'Overboekingen ontvangen']['inkomsten'].sum()
+    externe_uitgaven = totalen[~totalen['categorie'].isin(['Sparen/Overboeken'])]['uitgaven'].sum()
     extern_netto = externe_inkomsten - externe_uitgaven
     
     # Bereken totale bedragen (inclusief interne overboekingen)
-    totale_inkomsten = inkomsten_df['bedrag'].sum()
-    totale_uitgaven = uitgaven_df['bedrag'].sum()
+    totale_inkomsten = totalen['inkomsten'].sum()
+    totale_uitgaven = totalen['uitgaven'].sum()
     totaal_netto = totale_inkomsten - totale_uitgaven
     
     ws.append(["", ""])
     ws.append(["FINANCIEEL OVERZICHT (netto)"])
-    ws.append(["Netto inkomsten:", externe_inkomsten])
-    ws.append(["Netto uitgaven:", externe_uitgaven])
-    ws.append(["Netto resultaat:", extern_netto])
+    ws.append(["Netto inkomsten:", euro(externe_inkomsten)])
+    ws.append(["Netto uitgaven:", euro(externe_uitgaven)])
+    ws.append(["Netto resultaat:", euro(extern_netto)])
     
     ws.append(["", ""])
     ws.append(["FINANCIEEL OVERZICHT (totaal inclusief interne overboekingen)"])
-    ws.append(["Totale inkomsten:", totale_inkomsten])
-    ws.append(["Totale uitgaven:", totale_uitgaven])
-    ws.append(["Totaal netto resultaat:", totaal_netto])
+    ws.append(["Totale inkomsten:", euro(totale_inkomsten)])
+    ws.append(["Totale uitgaven:", euro(totale_uitgaven)])
+    ws.append(["Totaal netto resultaat:", euro(totaal_netto)])
     
     # Interne overboekingen per rekening
     ws.append(["", ""])
     ws.append(["INTERNE OVERBOEKINGEN (per rekening)"])
-    interne = get_interne_overboekingen_per_rekening(df)
+    interne = get_interne_overboekingen_per_rekening(totalen)
     ws.append(["Rekening", "Ontvangen", "Sparen/Overboeken", "Rente"])
     for _, row in interne.iterrows():
         ws.append([
             row['rekening'],
-            row['ontvangen'],
-            row['sparen'],
-            row['rente']
+            euro(row['ontvangen']),
+            euro(row['sparen']),
+            euro(row['rente'])
         ])
     ws.append([
         "Totaal",
-        interne['ontvangen'].sum(),
-        interne['sparen'].sum(),
-        interne['rente'].sum()
+        euro(interne['ontvangen'].sum()),
+        euro(interne['sparen'].sum()),
+        euro(interne['rente'].sum())
     ])
     
     # Algemene statistieken
     ws.append(["", ""])
     ws.append(["STATISTIEKEN"])
-    ws.append(["Aantal transacties:", len(df)])
-    ws.append(["Aantal rekeningen:", df['rekening'].nunique()])
-    ws.append(["Aantal categorieën:", df['categorie'].nunique()])
+    ws.append(["Aantal transacties:", int(totalen['aantal'].sum())])
+    ws.append(["Aantal rekeningen:", totalen['rekening'].nunique()])
+    ws.append(["Aantal categorieën:", totalen['categorie'].nunique()])
     
     # Kolombreedte optimaliseren
     for col in ws.columns:
@@ -1,5 +1,6 @@
 from openpyxl.styles import Font, PatternFill
 from openpyxl.utils import get_column_letter
+from ..bedragen import euro
 
 def create_transactions_sheet(wb, df, jaar, suffix=""):
     ws = wb.create_sheet(f"Alle Transacties {suffix}")
@@ -16,7 +17,7 @@ def create_transactions_sheet(wb, df, jaar, suffix=""):
         ws.cell(row=row, column=3, value=transaction['naam'])
         ws.cell(row=row, column=4, value=transaction['omschrijving'])
 
-        bedrag_cell = ws.cell(row=row, column=5, value=transaction['bedrag'])
+        bedrag_cell = ws.cell(row=row, column=5, value=euro(transaction['bedrag']))
         bedrag_cell.number_format = '#,##0.00'
         if transaction['bedrag'] < 0:
             bedrag_cell.font = Font(color="FF0000")
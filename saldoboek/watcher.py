@@ -0,0 +1,129 @@
+import os
+import time
+
+from .categorization import Categorizer
+from .importer import TransactionImporter
+
+NEGEER_PREFIX = ('.', '~')
+NEGEER_EXTENSIES = ('.tmp', '.part', '.crdownload', '.partial')
+# Statussen waarmee een bestand klaar is; andere (zoals 'fout') worden bij de volgende scan opnieuw geprobeerd
+EINDSTATUSSEN = ('geimporteerd', 'al_geimporteerd', 'leeg', 'onbekend_formaat')
+
+
+class MapBewaker:
+    """Bewaakt een map met per gebruiker een submap en importeert nieuwe exports.
+
+    Structuur: <map>/<gebruikersnaam>/**/bestand. Een bestand wordt pas
+    geïmporteerd als grootte en wijzigingstijd tussen twee scans gelijk zijn
+    gebleven en het minstens `rusttijd` seconden niet is gewijzigd, zodat
+    half geschreven bestanden worden overgeslagen. De verwerkte versie van elk
+    bestand wordt in de database vastgelegd, zodat een herstart niets opnieuw
+    verwerkt; een gewijzigd bestand wordt wel opnieuw aangeboden. Een bestand
+    dat mislukt (bijvoorbeeld omdat de database op slot zat) wordt niet
+    vastgelegd en bij de volgende scan opnieuw geprobeerd.
+    """
+
+    def __init__(self, db, map_pad, interval=2, rusttijd=2, parallel=False):
+        self.db = db
+        self.map_pad = os.path.abspath(map_pad)
+        self.interval = interval
+        self.rusttijd = rusttijd
+        self.parallel = parallel
+        self.cursor = db.get_watch_cursor()
+        self.vorige_scan = {}
+        self.importers = {}
+        self.onbekende_gebruikers = set()
+
+    def run(self):
+        """Scan de map tot het proces wordt gestopt (Ctrl+C); een mislukte scan stopt het bewaken niet"""
+        print(f"✓ Bewaken van {self.map_pad} (elke {self.interval}s)")
+        try:
+            while True:
+                try:
+                    self.verwerk()
+                except Exception as e:
+                    print(f"  ! Scan mislukt, volgende scan probeert het opnieuw: {e}")
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("\nBewaken gestopt.")
+
+    def verwerk(self):
+        """Eén scanronde: importeer alle stabiele, nog niet verwerkte bestanden.
+
+        Alleen bestanden met een eindstatus worden vastgelegd. Een fout bij één
+        gebruiker (een verdwenen bestand, een database op slot) wordt gemeld en
+        de bestanden van de andere gebruikers worden gewoon verwerkt.
+        """
+        samenvattingen = []
+        for gebruiker_id, bestanden in self._klaar_voor_import().items():
+            paden = [pad for pad, _, _ in bestanden]
+            try:
+                samenvatting = self._importer(gebruiker_id).import_batch(paden, parallel=self.parallel and len(paden) > 1)
+                status = {b['bestand']: b['status'] for b in samenvatting['bestanden']}
+
+                verwerkt = [
+                    (pad, gebruiker_id, grootte, gewijzigd, status[pad])
+                    for pad, grootte, gewijzigd in bestanden if status.get(pad) in EINDSTATUSSEN
+                ]
+                self.db.register_watched_files(verwerkt)
+            except Exception as e:
+                print(f"  ! Import voor gebruiker {gebruiker_id} mislukt, volgende scan probeert het opnieuw: {e}")
+                continue
+
+            for pad, _, grootte, gewijzigd, _ in verwerkt:
+                self.cursor[pad] = (grootte, gewijzigd)
+            samenvattingen.append(samenvatting)
+        return samenvattingen
+
+    def _importer(self, gebruiker_id):
+        # Categorizer en importer per gebruiker hergebruiken tussen scans
+        if gebruiker_id not in self.importers:
+            categorizer = Categorizer(self.db, gebruiker_id)
+            self.importers[gebruiker_id] = TransactionImporter(categorizer, self.db, gebruiker_id)
+        return self.importers[gebruiker_id]
+
+    def _klaar_voor_import(self):
+        """Geef per gebruiker_id de bestanden (pad, grootte, gewijzigd) die klaar zijn"""
+        gebruikers = {naam: gebruiker_id for gebruiker_id, naam in self.db.get_all_users()}
+        nu = time.time()
+        scan = {}
+        klaar = {}
+
+        for naam, pad, grootte, gewijzigd in self._scan():
+            gebruiker_id = gebruikers.get(naam)
+            if gebruiker_id is None:
+                if naam not in self.onbekende_gebruikers:
+                    self.onbekende_gebruikers.add(naam)
+                    print(f"  ! Map '{naam}' hoort niet bij een bekende gebruiker, overgeslagen")
+                continue
+
+            scan[pad] = (grootte, gewijzigd)
+            if self.cursor.get(pad) == (grootte, gewijzigd):
+                continue
+            # Debounce: ongewijzigd sinds de vorige scan en lang genoeg in rust
+            if self.vorige_scan.get(pad) != (grootte, gewijzigd) or nu - gewijzigd < self.rusttijd:
+                continue
+            klaar.setdefault(gebruiker_id, []).append((pad, grootte, gewijzigd))
+
+        self.vorige_scan = scan
+        return klaar
+
+    def _scan(self):
+        """Loop de submappen af; levert (gebruikersnaam, pad, grootte, gewijzigd) op"""
+        if not os.path.isdir(self.map_pad):
+            return
+        with os.scandir(self.map_pad) as mappen:
+            gebruikersmappen = sorted((m.name, m.path) for m in mappen if m.is_dir() and not m.name.startswith('.'))
+
+        for naam, gebruikersmap in gebruikersmappen:
+            for huidige, submappen, bestanden in os.walk(gebruikersmap):
+                submappen[:] = sorted(m for m in submappen if not m.startswith(NEGEER_PREFIX))
+                for bestand in sorted(bestanden):
+                    if bestand.startswith(NEGEER_PREFIX) or bestand.lower().endswith(NEGEER_EXTENSIES):
+                        continue
+                    pad = os.path.join(huidige, bestand)
+                    try:
+                        info = os.stat(pad)
+                    except FileNotFoundError:
+                        continue
+                    yield naam, pad, info.st_size, info.st_mtime